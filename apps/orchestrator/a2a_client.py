@@ -1,17 +1,61 @@
 from __future__ import annotations
 
+import os
 import uuid
-from dataclasses import dataclass
-from typing import Any, Dict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
 
 import httpx
 
 Json = Dict[str, Any]
 
 
+# HTTP/2 multiplext parallelle calls over één verbinding, maar vereist het
+# optionele h2-pakket; daarom opt-in via env en met fallback naar HTTP/1.1.
+_HTTP2 = os.getenv("ORCH_HTTP2", "0").strip().lower() in ("1", "true", "yes")
+
+
+def make_client(
+    timeout: Optional[float] = 20.0,
+    max_connections: int = 100,
+    max_keepalive: int = 20,
+) -> httpx.AsyncClient:
+    # Pooled client: keep-alive connections avoid a TCP (and TLS) handshake
+    # on every call; the orchestrator fires several MCP/A2A calls per flow.
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=60.0,
+    )
+    try:
+        return httpx.AsyncClient(timeout=timeout, limits=limits, http2=_HTTP2)
+    except ImportError:  # h2 niet geïnstalleerd
+        return httpx.AsyncClient(timeout=timeout, limits=limits)
+
+
 @dataclass
 class A2AClient:
     base_url: str
+    # Optioneel geïnjecteerde gedeelde pool; zonder injectie maakt de client
+    # er zelf één aan en is hij ook eigenaar (aclose sluit hem dan).
+    client: Optional[httpx.AsyncClient] = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self._owns_client = self.client is None
+        if self.client is None:
+            self.client = make_client()
+
+    async def aclose(self) -> None:
+        if self._owns_client and self.client is not None:
+            await self.client.aclose()
+
+    async def warmup(self) -> None:
+        # Populate the keep-alive pool so the first real POST skips the TCP
+        # handshake. Errors are ignored; the actual call will surface them.
+        try:
+            await self.client.head(self.base_url, timeout=2.0)
+        except httpx.HTTPError:
+            pass
 
     async def message_send(self, capability: str, payload: Json, timeout_s: float = 20.0) -> Json:
         req_id = str(uuid.uuid4())
@@ -35,10 +79,9 @@ class A2AClient:
                 },
             },
         }
-        async with httpx.AsyncClient(timeout=timeout_s) as client:
-            r = await client.post(self.base_url, json=rpc)
-            r.raise_for_status()
-            data = r.json()
-            if "error" in data:
-                raise RuntimeError(f"A2A error: {data['error']}")
-            return (data.get("result") or {}).get("data") or {}
+        r = await self.client.post(self.base_url, json=rpc, timeout=timeout_s)
+        r.raise_for_status()
+        data = r.json()
+        if "error" in data:
+            raise RuntimeError(f"A2A error: {data['error']}")
+        return (data.get("result") or {}).get("data") or {}
@@ -2,17 +2,47 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
 import time
 import uuid
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 Json = Dict[str, Any]
 
+log = logging.getLogger("a2ui")
+
+
+# Sentinel die de /events-generator direct wakker maakt als de sessie stopt,
+# zodat die niet op een queue-timeout hoeft te wachten.
+DISCONNECT_SENTINEL: Json = {"kind": "_disconnect"}
+
+
+# Cache van JSON-pointerpaden voor statusvelden: de set veldnamen is klein
+# en vast, dus de padstrings worden één keer gebouwd en daarna hergebruikt.
+_STATUS_PATHS: Dict[str, str] = {}
+
+
+def status_path(field_name: str) -> str:
+    p = _STATUS_PATHS.get(field_name)
+    if p is None:
+        p = _STATUS_PATHS[field_name] = "/status/" + field_name
+    return p
+
+
+_NOW_CACHE: Tuple[int, str] = (0, "")
+
 
 def now_iso() -> str:
-    # Local time ISO, second precision (demo)
-    return time.strftime("%Y-%m-%d %H:%M:%S")
+    # Local time ISO, second precision (demo). Elke statuspush stempelt
+    # lastRefresh; met secondeprecisie is één strftime per seconde genoeg.
+    global _NOW_CACHE
+    t = int(time.time())
+    cached = _NOW_CACHE
+    if cached[0] != t:
+        cached = (t, time.strftime("%Y-%m-%d %H:%M:%S"))
+        _NOW_CACHE = cached
+    return cached[1]
 
 
 def new_message_id() -> str:
@@ -27,16 +57,19 @@ def _ensure_path(obj: Json, path: str) -> Any:
     cur: Any = obj
     for seg in parts[:-1]:
         if isinstance(cur, dict):
-            if seg not in cur or not isinstance(cur[seg], dict):
+            if seg not in cur or not isinstance(cur[seg], (dict, list)):
                 cur[seg] = {}
             cur = cur[seg]
+        elif isinstance(cur, list) and seg.isdigit() and int(seg) < len(cur):
+            cur = cur[int(seg)]
         else:
-            raise ValueError(f"Cannot traverse non-dict at segment '{seg}' for path '{path}'")
+            raise ValueError(f"Cannot traverse segment '{seg}' for path '{path}'")
     return cur, (parts[-1] if parts else "")
 
 
 def apply_patches(model: Json, patches: List[Json]) -> Json:
-    # Minimal JSON Patch subset for demo: add/replace at JSON pointer
+    # Minimal JSON Patch subset for demo: add/replace at JSON pointer,
+    # including list append ("/results/-") and list index targets.
     for p in patches:
         op = p.get("op")
         path = p.get("path")
@@ -52,6 +85,16 @@ def apply_patches(model: Json, patches: List[Json]) -> Json:
                 model.clear()
                 model.update(value)
             continue
+        if isinstance(parent, list):
+            if last == "-":
+                parent.append(value)
+            elif last.isdigit():
+                idx = int(last)
+                if op == "add" and idx <= len(parent):
+                    parent.insert(idx, value)
+                elif idx < len(parent):
+                    parent[idx] = value
+            continue
         if isinstance(parent, dict):
             parent[last] = value
     return model
@@ -79,6 +122,12 @@ class SessionState:
     session_id: str
     queue: "asyncio.Queue[Json]" = field(default_factory=asyncio.Queue)
     models: Dict[str, Json] = field(default_factory=dict)
+    # Statusvelden die bij een volle queue zijn gedropt, per surface; ze
+    # worden samengevoegd met de eerstvolgende statuspush.
+    pending_status: Dict[str, Json] = field(default_factory=dict)
+    # Lopende flow-taken van deze sessie; bij disconnect geannuleerd zodat
+    # er geen werk doorloopt voor een dode queue.
+    tasks: set = field(default_factory=set)
 
     def get_model(self, surface_id: str) -> Json:
         if surface_id not in self.models:
@@ -87,14 +136,18 @@ class SessionState:
 
 
 class SessionHub:
-    def __init__(self) -> None:
+    def __init__(self, max_queue: int = 0, push_timeout_s: float = 5.0) -> None:
+        # max_queue > 0 begrenst de per-sessie queue zodat een trage browser
+        # geen onbegrensde berg patches in het geheugen kan opbouwen.
+        self._max_queue = max_queue
+        self._push_timeout_s = push_timeout_s
         self._sessions: Dict[str, SessionState] = {}
         self._lock = asyncio.Lock()
 
     async def create(self) -> SessionState:
         async with self._lock:
             sid = str(uuid.uuid4())
-            s = SessionState(session_id=sid)
+            s = SessionState(session_id=sid, queue=asyncio.Queue(maxsize=self._max_queue))
             self._sessions[sid] = s
             return s
 
@@ -102,15 +155,45 @@ class SessionHub:
         async with self._lock:
             return self._sessions.get(sid)
 
+    def register_task(self, sid: str, task: "asyncio.Task[Any]") -> None:
+        # Sync (geen lock nodig): alleen aangeroepen vanaf de event loop.
+        s = self._sessions.get(sid)
+        if s is None:
+            task.cancel()
+            return
+        s.tasks.add(task)
+        task.add_done_callback(s.tasks.discard)
+
     async def drop(self, sid: str) -> None:
         async with self._lock:
-            self._sessions.pop(sid, None)
+            s = self._sessions.pop(sid, None)
+        if s:
+            for t in list(s.tasks):
+                t.cancel()
+            try:
+                s.queue.put_nowait(DISCONNECT_SENTINEL)
+            except asyncio.QueueFull:
+                # Maak plaats zodat de consumer de sentinel gegarandeerd ziet.
+                try:
+                    s.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+                s.queue.put_nowait(DISCONNECT_SENTINEL)
+
+    async def _put(self, s: SessionState, msg: Json) -> None:
+        # Backpressure: blijft de queue langer dan de timeout vol, dan is de
+        # client te traag of weg; sluit de sessie in plaats van te groeien.
+        try:
+            await asyncio.wait_for(s.queue.put(msg), timeout=self._push_timeout_s)
+        except asyncio.TimeoutError:
+            log.warning("slow SSE client; dropping session %s", s.session_id)
+            await self.drop(s.session_id)
 
     async def push(self, sid: str, msg: Json) -> None:
         s = await self.get(sid)
         if not s:
             return
-        await s.queue.put(msg)
+        await self._put(s, msg)
 
     async def push_update_and_apply(self, sid: str, surface_id: str, patches: List[Json]) -> None:
         s = await self.get(sid)
@@ -118,4 +201,27 @@ class SessionHub:
             return
         model = s.get_model(surface_id)
         apply_patches(model, patches)
-        await s.queue.put(data_model_update(surface_id, patches))
+        await self._put(s, data_model_update(surface_id, patches))
+
+    async def push_status(self, sid: str, surface_id: str, fields: Json) -> None:
+        # Snelpad voor de chatty statusstroom: muteer /status direct (geen
+        # JSON-pointer parsing) en zet de velden op de draad in het gewone
+        # dataModelUpdate-patchformaat dat de web shell al verwacht.
+        s = await self.get(sid)
+        if not s:
+            return
+        pending = s.pending_status.pop(surface_id, None)
+        if pending:
+            pending.update(fields)
+            fields = pending
+        model = s.get_model(surface_id)
+        status = model.setdefault("status", {})
+        status.update(fields)
+        patches = [{"op": "replace", "path": status_path(k), "value": v} for k, v in fields.items()]
+        try:
+            # Status is niet-kritiek: nooit de flow laten blokkeren op een
+            # trage client; bij een volle queue bewaren we de velden en gaan
+            # ze mee met de volgende statuspush (het model is al bijgewerkt).
+            s.queue.put_nowait(data_model_update(surface_id, patches))
+        except asyncio.QueueFull:
+            s.pending_status[surface_id] = dict(fields)
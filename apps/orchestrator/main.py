@@ -1,76 +1,220 @@
 from __future__ import annotations
 
 import asyncio
+import copy
+import hashlib
+import hmac
+import json
+import logging
 import os
+import re
 import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from itertools import islice
 from typing import Any, Dict, List, Optional
 
+try:
+    import orjson
+except ImportError:  # optioneel: snellere JSON-serialisatie, stdlib-fallback
+    orjson = None
+
+try:
+    import uvloop
+
+    uvloop.install()
+except ImportError:  # optioneel: snellere event loop (niet op Windows)
+    pass
+
 from dotenv import load_dotenv
 from fastapi import Body, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 
-from a2ui import SessionHub, now_iso, surface_open
-from a2a_client import A2AClient
+from a2ui import DISCONNECT_SENTINEL, SessionHub, now_iso, status_path, surface_open
+from a2a_client import A2AClient, make_client
 from mcp_client import MCPClient
 
 Json = Dict[str, Any]
-def _guaranteed_form_block(query: str) -> Json:
-    """Hard guarantee: always produce a minimal form with fields for the demo."""
-    q = (query or "").strip()
-    low = q.lower()
 
-    scenario = "algemeen"
-    if any(k in low for k in ["uitstel", "betalingsregeling", "betaal", "betalen", "incasso"]):
-        scenario = "betaling"
-    elif any(k in low for k in ["bezwaar", "bezwaarschrift", "beroep"]):
-        scenario = "bezwaar"
-    elif "toeslag" in low or "toeslagen" in low:
-        scenario = "toeslagen"
+# Eén gecompileerde alternatie per onderwerp: één C-level scan over de query
+# in plaats van geneste any(k in q)-lussen per keywordlijst.
+_RE_BETALING = re.compile(r"uitstel|betalingsregeling|betaal|betalen|incasso")
+_RE_BEZWAAR = re.compile(r"bezwaar|bezwaarschrift|beroep")
+_RE_TOESLAG = re.compile(r"toeslag")
+
+
+def _scenario_of(query: str) -> str:
+    """Eén plek voor scenario-detectie op een query (betaling/bezwaar/toeslagen)."""
+    low = (query or "").strip().lower()
+    if _RE_BETALING.search(low):
+        return "betaling"
+    if _RE_BEZWAAR.search(low):
+        return "bezwaar"
+    if _RE_TOESLAG.search(low):
+        return "toeslagen"
+    return "algemeen"
+
+
+# Het gegarandeerde formulier hangt alleen van het scenario af; bouw de vier
+# varianten één keer bij import en geef per call een deepcopy terug (het
+# resultaat wordt downstream gemuteerd/opgeslagen).
+_FORM_BASE_FIELDS: tuple = (
+    {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
+    {"id": "vraag", "label": "Uw vraag", "type": "text", "required": True, "minLength": 10, "placeholder": "Omschrijf kort uw situatie of vraag (demo)."},
+)
+_FORM_EXTRA_FIELDS: Dict[str, tuple] = {
+    "betaling": (
+        {"id": "kenmerk", "label": "Kenmerk / aanslagnummer", "type": "text", "required": True, "minLength": 6, "placeholder": "Bijv. 00.00.000.000 (placeholder)."},
+        {"id": "bedrag", "label": "Bedrag (EUR)", "type": "number", "required": False, "placeholder": "Bijv. 750"},
+    ),
+    "bezwaar": (
+        {"id": "kenmerk", "label": "Kenmerk / aanslagnummer", "type": "text", "required": True, "minLength": 6, "placeholder": "Bijv. 00.00.000.000 (placeholder)."},
+        {"id": "motivering", "label": "Kern van uw bezwaar", "type": "text", "required": True, "minLength": 20, "placeholder": "Waarom bent u het niet eens? (demo)"},
+    ),
+    "toeslagen": (
+        {"id": "regeling", "label": "Regeling", "type": "text", "required": True, "placeholder": "Bijv. huurtoeslag / zorgtoeslag (demo)"},
+        {"id": "jaar", "label": "Jaar", "type": "number", "required": False, "placeholder": "Bijv. 2025"},
+    ),
+    "algemeen": (),
+}
+_FORM_TEMPLATES: Dict[str, Json] = {
+    scenario: {
+        "kind": "form",
+        "title": "Gegevens",
+        "formId": "form",
+        "submitLabel": "Verstuur",
+        "fields": list(_FORM_BASE_FIELDS + extra),
+    }
+    for scenario, extra in _FORM_EXTRA_FIELDS.items()
+}
 
-    fields: List[Json] = [
-        {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
-        {"id": "vraag", "label": "Uw vraag", "type": "text", "required": True, "minLength": 10, "placeholder": "Omschrijf kort uw situatie of vraag (demo)."},
-    ]
 
-    if scenario == "betaling":
-        fields += [
-            {"id": "kenmerk", "label": "Kenmerk / aanslagnummer", "type": "text", "required": True, "minLength": 6, "placeholder": "Bijv. 00.00.000.000 (placeholder)."},
-            {"id": "bedrag", "label": "Bedrag (EUR)", "type": "number", "required": False, "placeholder": "Bijv. 750"},
-        ]
-    elif scenario == "bezwaar":
-        fields += [
-            {"id": "kenmerk", "label": "Kenmerk / aanslagnummer", "type": "text", "required": True, "minLength": 6, "placeholder": "Bijv. 00.00.000.000 (placeholder)."},
-            {"id": "motivering", "label": "Kern van uw bezwaar", "type": "text", "required": True, "minLength": 20, "placeholder": "Waarom bent u het niet eens? (demo)"},
-        ]
-    elif scenario == "toeslagen":
-        fields += [
-            {"id": "regeling", "label": "Regeling", "type": "text", "required": True, "placeholder": "Bijv. huurtoeslag / zorgtoeslag (demo)"},
-            {"id": "jaar", "label": "Jaar", "type": "number", "required": False, "placeholder": "Bijv. 2025"},
-        ]
+def _guaranteed_form_block(query: str) -> Json:
+    """Hard guarantee: always produce a minimal form with fields for the demo."""
+    return copy.deepcopy(_FORM_TEMPLATES[_scenario_of(query)])
+
+
+# Deterministic fallback blocks are structurally constant; build them once at
+# import instead of re-allocating the nested literals on every failure path.
+# Downstream sanitization copies these before they are mutated or stored.
+_FORM_FALLBACK_BLOCK: Json = {
+    "kind": "form",
+    "title": "Formulier (demo)",
+    "formId": "contact_v1",
+    "description": "Vul enkele gegevens in. Dit is een deterministische fallback.",
+    "submitLabel": "Verstuur",
+    "fields": [
+        {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
+        {"id": "toelichting", "label": "Toelichting", "type": "textarea", "required": True, "placeholder": "Beschrijf kort uw vraag."},
+    ],
+}
 
-    return {"kind": "form", "title": "Gegevens", "formId": "form", "submitLabel": "Verstuur", "fields": fields}
+_WIZARD_START_DECISION: Json = {
+    "kind": "decision",
+    "title": "Stap 1",
+    "question": "Waar gaat uw vraag over?",
+    "options": ["Bezwaar maken", "Betalen", "Toeslagen", "Contact", "Anders"],
+}
 
 
 load_dotenv()
 
+log = logging.getLogger("orchestrator")
+
 ORCH_PORT = int(os.getenv("ORCH_PORT", "10002"))
 MCP_SSE_URL = os.getenv("MCP_SSE_URL", "http://127.0.0.1:8000/sse")
 
+# Begrensde SSE-queue per sessie; een te trage client wordt na de timeout
+# afgesloten in plaats van onbeperkt geheugen te vullen.
+SSE_MAX_QUEUE_SIZE = int(os.getenv("SSE_MAX_QUEUE_SIZE", "1000"))
+SSE_QUEUE_TIMEOUT = float(os.getenv("SSE_QUEUE_TIMEOUT", "5.0"))
+
 A2A_TOESLAGEN_URL = os.getenv("A2A_TOESLAGEN_URL", "http://localhost:8010/")
 A2A_BEZWAAR_URL = os.getenv("A2A_BEZWAAR_URL", "http://localhost:8020/")
 A2A_GENUI_URL = os.getenv("A2A_GENUI_URL", "http://localhost:8030/")
 
-hub = SessionHub()
-mcp = MCPClient(MCP_SSE_URL)
-a2a_toes = A2AClient(A2A_TOESLAGEN_URL)
-a2a_bez = A2AClient(A2A_BEZWAAR_URL)
-a2a_genui = A2AClient(A2A_GENUI_URL)
+# Gedeeld geheim met de GenUI-agent; indien gezet tekent de agent zijn blocks
+# met een HMAC en mag de volledige sanitizer hier worden overgeslagen.
+GENUI_TRUSTED_SECRET = os.getenv("GENUI_TRUSTED_SECRET", "").strip()
+
+hub = SessionHub(max_queue=SSE_MAX_QUEUE_SIZE, push_timeout_s=SSE_QUEUE_TIMEOUT)
+
+# Eén gedeelde HTTP-pool voor al het MCP/A2A-verkeer, zodat keep-alive
+# connecties over alle clients en sessies heen hergebruikt worden. Timeout
+# staat op None omdat de MCP SSE-stream open blijft; A2A-calls zetten hun
+# eigen per-request timeout.
+http_client = make_client(timeout=None, max_connections=200, max_keepalive=100)
+
+mcp = MCPClient(MCP_SSE_URL, client=http_client)
+a2a_toes = A2AClient(A2A_TOESLAGEN_URL, client=http_client)
+a2a_bez = A2AClient(A2A_BEZWAAR_URL, client=http_client)
+a2a_genui = A2AClient(A2A_GENUI_URL, client=http_client)
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    # Starlette draait sync werk via anyio's default limiter (40 tokens).
+    # Ruimer zetten voorkomt dat incidenteel geblokkeerd werk achter het
+    # MCP/A2A-fan-out verkeer in de rij komt te staan.
+    import anyio
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = int(
+        os.getenv("ORCH_THREAD_TOKENS", "100")
+    )
+    try:
+        yield
+    finally:
+        # Alle MCP/A2A-clients delen één pool; één keer sluiten volstaat.
+        await http_client.aclose()
+
+
+# orjson serialiseert de kleine API-responses een stuk sneller dan stdlib
+# json; zonder orjson valt de app terug op de gewone JSONResponse.
+app = FastAPI(
+    title="Overheid Assistants Orchestrator",
+    version="0.1.6",
+    default_response_class=ORJSONResponse if orjson is not None else JSONResponse,
+    lifespan=_lifespan,
+)
+
+
+class _CachedCORSMiddleware(CORSMiddleware):
+    """Hergebruikt de preflight-response per (origin, method, headers)-combinatie.
+
+    De browser stuurt voor elke client-event POST een OPTIONS-preflight met
+    dezelfde headers; het antwoord is deterministisch en kan dus gecachet.
+    """
+
+    _PREFLIGHT_CACHE_MAX = 16
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._preflight_cache: Dict[tuple, Any] = {}
 
-app = FastAPI(title="Overheid Assistants Orchestrator", version="0.1.6")
+    def preflight_response(self, request_headers):  # type: ignore[override]
+        key = (
+            request_headers.get("origin"),
+            request_headers.get("access-control-request-method"),
+            request_headers.get("access-control-request-headers"),
+        )
+        resp = self._preflight_cache.get(key)
+        if resp is None:
+            resp = super().preflight_response(request_headers)
+            if len(self._preflight_cache) < self._PREFLIGHT_CACHE_MAX:
+                self._preflight_cache[key] = resp
+        return resp
+
+
+# Opt-in gzip: JSON-patchframes comprimeren goed (veel herhaalde keys),
+# maar compressie kost CPU en sommige proxies bufferen gecomprimeerde
+# streams; daarom default uit.
+if os.getenv("ORCH_GZIP", "0").strip().lower() in ("1", "true", "yes"):
+    app.add_middleware(GZipMiddleware, minimum_size=512)
 
 app.add_middleware(
-    CORSMiddleware,
+    _CachedCORSMiddleware,
     allow_origins=[
         "http://localhost:5173",
         "http://127.0.0.1:5173",
@@ -83,30 +227,40 @@ app.add_middleware(
 )
 
 
+# Surface skeletons are fixed apart from the message and lastRefresh stamp;
+# keep one template and copy+stamp per call (models are mutated per session,
+# so each call must still hand out fresh dicts).
+_STATUS_TEMPLATE: Json = {
+    "loading": False,
+    "message": "",
+    "step": "idle",
+    "source": "",
+    "sourceReason": "",
+}
+
+
 def _home_surface_model() -> Json:
-    return {
-        "status": {
-            "loading": False,
-            "message": "A2UI: Kies een assistent om te starten.",
-            "step": "idle",
-            "lastRefresh": now_iso(),
-            "source": "",
-            "sourceReason": "",
-        },
-        "results": [],
-    }
+    return _empty_surface_model("A2UI: Kies een assistent om te starten.")
+
 
+# Verwachte stappen per flow; gaat als status.timeline mee bij surface-open
+# zodat de shell de hele voortgang meteen kan tekenen en de per-stap patches
+# alleen nog status.step hoeven bij te werken. Onbekend bij de shell = genegeerd.
+_FLOW_TIMELINES: Dict[str, tuple] = {
+    "toeslagen": ("rules_lookup", "doc_checklist", "risk_notes", "explain_toeslagen", "done"),
+    "bezwaar": ("extract_entities", "classify_case", "policy_snippets", "structure_bezwaar", "done"),
+    "genui_search": ("bd_search", "compose_ui", "done"),
+    "genui_form": ("bd_search", "compose_form", "waiting"),
+}
 
-def _empty_surface_model(message: str) -> Json:
+
+def _empty_surface_model(message: str, surface_id: Optional[str] = None) -> Json:
+    status = {**_STATUS_TEMPLATE, "message": message, "lastRefresh": now_iso()}
+    timeline = _FLOW_TIMELINES.get(surface_id) if surface_id else None
+    if timeline is not None:
+        status["timeline"] = list(timeline)
     return {
-        "status": {
-            "loading": False,
-            "message": message,
-            "step": "idle",
-            "lastRefresh": now_iso(),
-            "source": "",
-            "sourceReason": "",
-        },
+        "status": status,
         "results": [],
     }
 
@@ -129,31 +283,128 @@ async def _set_status(
     source: Optional[str] = None,
     sourceReason: Optional[str] = None,
 ) -> None:
-    patches: List[Json] = []
+    fields: Json = {}
     if loading is not None:
-        patches.append({"op": "replace", "path": "/status/loading", "value": loading})
+        fields["loading"] = loading
     if message is not None:
-        patches.append({"op": "replace", "path": "/status/message", "value": message})
+        fields["message"] = message
     if step is not None:
-        patches.append({"op": "replace", "path": "/status/step", "value": step})
+        fields["step"] = step
     if source is not None:
-        patches.append({"op": "replace", "path": "/status/source", "value": source})
+        fields["source"] = source
     if sourceReason is not None:
-        patches.append({"op": "replace", "path": "/status/sourceReason", "value": sourceReason})
-    patches.append({"op": "replace", "path": "/status/lastRefresh", "value": now_iso()})
-    await hub.push_update_and_apply(sid, surface_id, patches)
+        fields["sourceReason"] = sourceReason
+    fields["lastRefresh"] = now_iso()
+    await hub.push_status(sid, surface_id, fields)
 
 
 async def _set_results(sid: str, surface_id: str, results: List[Json]) -> None:
     await hub.push_update_and_apply(sid, surface_id, [{"op": "replace", "path": "/results", "value": results}])
 
 
+class _PatchBatch:
+    """Verzamelt status/results-patches voor één surface en flusht ze als één
+    SSE-frame, zodat back-to-back updates niet elk een eigen frame kosten."""
+
+    def __init__(self, sid: str, surface_id: str) -> None:
+        self.sid = sid
+        self.surface_id = surface_id
+        self.patches: List[Json] = []
+
+    def status(self, **fields: Any) -> "_PatchBatch":
+        fields["lastRefresh"] = now_iso()
+        self.patches.extend({"op": "replace", "path": status_path(k), "value": v} for k, v in fields.items())
+        return self
+
+    def replace_results(self, results: List[Json]) -> "_PatchBatch":
+        self.patches.append({"op": "replace", "path": "/results", "value": results})
+        return self
+
+    def append_results(self, items: List[Json]) -> "_PatchBatch":
+        self.patches.extend({"op": "add", "path": "/results/-", "value": it} for it in items)
+        return self
+
+    async def flush(self) -> None:
+        if self.patches:
+            await hub.push_update_and_apply(self.sid, self.surface_id, self.patches)
+            self.patches = []
+
+
+async def _append_results(sid: str, surface_id: str, items: List[Json]) -> None:
+    """Append blocks via JSON-Patch add ops so only the delta goes over SSE."""
+    if not items:
+        return
+    await hub.push_update_and_apply(sid, surface_id, [{"op": "add", "path": "/results/-", "value": it} for it in items])
+
+
+# Demo-pacing tussen progressive updates. Default 0: alleen een event-loop
+# yield zodat de SSE-writer kan flushen, zonder kunstmatige wachttijd.
+# Zet ORCH_TICK_SECONDS=0.6 voor het oude geanimeerde demo-tempo.
+_TICK_SECONDS = float(os.getenv("ORCH_TICK_SECONDS", "0"))
+
+
 async def _sleep_tick() -> None:
-    await asyncio.sleep(0.6)
+    await asyncio.sleep(_TICK_SECONDS)
+
+
+# In-flight request coalescing: concurrent identical calls (same key) await
+# one shared task instead of duplicating the MCP/A2A round-trip.
+_inflight: Dict[Any, "asyncio.Task[Any]"] = {}
+
+
+async def _coalesced(key: Any, factory) -> Any:
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(factory())
+        _inflight[key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(key, None))
+    return await task
+
 
+# TTL-cache voor pure MCP-tools: hun resultaat hangt alleen van de
+# argumenten af, dus binnen de TTL is een herhaald verzoek een dict-lookup
+# in plaats van een volledige MCP round-trip. Begrensd als LRU.
+_MCP_CACHEABLE = frozenset({"rules_lookup", "doc_checklist", "policy_snippets", "bd_search"})
+_MCP_CACHE: "OrderedDict[tuple, tuple[float, Json]]" = OrderedDict()
+_MCP_CACHE_MAX = 256
+_MCP_CACHE_TTL_S = float(os.getenv("MCP_CACHE_TTL_S", "300"))
 
-def _ms(dt_seconds: float) -> int:
-    return int(round(dt_seconds * 1000))
+
+def _mcp_cache_get(key: tuple) -> Optional[Json]:
+    hit = _MCP_CACHE.get(key)
+    if hit is None:
+        return None
+    if time.monotonic() - hit[0] >= _MCP_CACHE_TTL_S:
+        del _MCP_CACHE[key]
+        return None
+    _MCP_CACHE.move_to_end(key)
+    return hit[1]
+
+
+def _mcp_cache_put(key: tuple, result: Json) -> None:
+    _MCP_CACHE[key] = (time.monotonic(), result)
+    _MCP_CACHE.move_to_end(key)
+    while len(_MCP_CACHE) > _MCP_CACHE_MAX:
+        _MCP_CACHE.popitem(last=False)
+
+
+# Eenmalig bepaald: zijn de client-calls echte coroutines? Zo niet (bv. na
+# een wissel naar een synchrone SDK), dan gaan ze via een thread zodat de
+# event loop niet blokkeert onder gelijktijdige sessies.
+_MCP_CALL_IS_ASYNC = asyncio.iscoroutinefunction(MCPClient.call_tool)
+_A2A_CALL_IS_ASYNC = asyncio.iscoroutinefunction(A2AClient.message_send)
+
+
+async def _mcp_invoke(tool_name: str, args: Json) -> Json:
+    if _MCP_CALL_IS_ASYNC:
+        return await mcp.call_tool(tool_name, args)
+    return await asyncio.to_thread(mcp.call_tool, tool_name, args)
+
+
+async def _a2a_invoke(client: A2AClient, capability: str, payload: Json) -> Json:
+    if _A2A_CALL_IS_ASYNC:
+        return await client.message_send(capability, payload)
+    return await asyncio.to_thread(client.message_send, capability, payload)
 
 
 async def _mcp_call_with_trace(
@@ -163,14 +414,98 @@ async def _mcp_call_with_trace(
     args: Json,
     *,
     step: Optional[str] = None,
+    shared_key: Optional[Any] = None,
+    pre_message: Optional[str] = None,
 ) -> Json:
-    t0 = time.perf_counter()
-    result = await mcp.call_tool(tool_name, args)
-    dt = _ms(time.perf_counter() - t0)
-    await _set_status(sid, surface_id, loading=True, message=f"MCP: {tool_name} ({dt}ms)", step=step or tool_name)
+    if pre_message is not None:
+        await _set_status(sid, surface_id, loading=True, message=pre_message, step=step or tool_name)
+    cache_key: Optional[tuple] = None
+    if tool_name in _MCP_CACHEABLE:
+        cache_key = (tool_name, json.dumps(args, sort_keys=True, separators=(",", ":")))
+        cached = _mcp_cache_get(cache_key)
+        if cached is not None:
+            return cached
+    t0 = time.monotonic_ns()
+    if shared_key is not None:
+        result = await _coalesced(shared_key, lambda: _mcp_invoke(tool_name, args))
+    else:
+        result = await _mcp_invoke(tool_name, args)
+    dt = (time.monotonic_ns() - t0) // 1_000_000
+    if cache_key is not None:
+        _mcp_cache_put(cache_key, result)
+    if dt >= ORCH_TRACE_MIN_MS:
+        await _set_status(sid, surface_id, loading=True, message=f"MCP: {tool_name} ({dt}ms)", step=step or tool_name)
     return result
 
 
+async def _mcp_batch_with_trace(
+    sid: str,
+    surface_id: str,
+    calls: List[tuple],
+    *,
+    step: str,
+) -> List[Json]:
+    """Stuur meerdere tools als één JSON-RPC batch (één POST + SSE-framing)."""
+    t0 = time.monotonic_ns()
+    results = await mcp.batch_call(calls)
+    dt = (time.monotonic_ns() - t0) // 1_000_000
+    if dt >= ORCH_TRACE_MIN_MS:
+        names = "+".join(n for n, _ in calls)
+        await _set_status(sid, surface_id, loading=True, message=f"MCP: {names} ({dt}ms)", step=step)
+    return results
+
+
+class _CircuitBreaker:
+    """Minimal circuit breaker for A2A calls (demo-safe, no extra deps).
+
+    After `fail_max` consecutive failures the breaker opens and calls fail
+    fast (no network round-trip, no timeout wait) until `reset_timeout_s`
+    has passed; the flows' existing except-branches then serve the
+    deterministic fallback immediately.
+    """
+
+    def __init__(self, fail_max: int, reset_timeout_s: float) -> None:
+        self.fail_max = fail_max
+        self.reset_timeout_s = reset_timeout_s
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def check(self) -> None:
+        if self._failures < self.fail_max:
+            return
+        if time.monotonic() - self._opened_at >= self.reset_timeout_s:
+            # Half-open: allow one probe call through.
+            self._failures = self.fail_max - 1
+            return
+        raise RuntimeError("A2A circuit open (failing fast)")
+
+    def record_success(self) -> None:
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+
+
+# Trace-statussen onder deze drempel worden niet gepusht: sub-threshold
+# calls zijn toch niet zichtbaar voor de gebruiker, en dit scheelt een
+# JSON-patch-frame per snelle MCP/A2A-call. Zet op 0 om alles te zien.
+ORCH_TRACE_MIN_MS = int(os.getenv("ORCH_TRACE_MIN_MS", "50"))
+
+A2A_BREAKER_FAIL_MAX = int(os.getenv("A2A_BREAKER_FAIL_MAX", "5"))
+A2A_BREAKER_RESET_S = float(os.getenv("A2A_BREAKER_RESET_S", "30"))
+
+_a2a_breakers: Dict[str, _CircuitBreaker] = {}
+
+
+def _breaker_for(client: A2AClient) -> _CircuitBreaker:
+    b = _a2a_breakers.get(client.base_url)
+    if b is None:
+        b = _a2a_breakers[client.base_url] = _CircuitBreaker(A2A_BREAKER_FAIL_MAX, A2A_BREAKER_RESET_S)
+    return b
+
+
 async def _a2a_call_with_trace(
     sid: str,
     surface_id: str,
@@ -179,11 +514,26 @@ async def _a2a_call_with_trace(
     payload: Json,
     *,
     step: Optional[str] = None,
+    shared_key: Optional[Any] = None,
+    pre_message: Optional[str] = None,
 ) -> Json:
-    t0 = time.perf_counter()
-    result = await client.message_send(capability, payload)
-    dt = _ms(time.perf_counter() - t0)
-    await _set_status(sid, surface_id, loading=True, message=f"A2A: {capability} ({dt}ms)", step=step or capability)
+    breaker = _breaker_for(client)
+    breaker.check()
+    if pre_message is not None:
+        await _set_status(sid, surface_id, loading=True, message=pre_message, step=step or capability)
+    t0 = time.monotonic_ns()
+    try:
+        if shared_key is not None:
+            result = await _coalesced(shared_key, lambda: _a2a_invoke(client, capability, payload))
+        else:
+            result = await _a2a_invoke(client, capability, payload)
+    except Exception:
+        breaker.record_failure()
+        raise
+    breaker.record_success()
+    dt = (time.monotonic_ns() - t0) // 1_000_000
+    if dt >= ORCH_TRACE_MIN_MS:
+        await _set_status(sid, surface_id, loading=True, message=f"A2A: {capability} ({dt}ms)", step=step or capability)
     return result
 
 
@@ -210,29 +560,66 @@ def _a2a_payload(resp: Any) -> Dict[str, Any]:
 # GenUI: defensive block validation (whitelist)
 # -----------------------
 
-GENUI_ALLOWED_KINDS = {"callout", "citations", "accordion", "next_questions", "notice", "decision", "form"}
+GENUI_ALLOWED_KINDS = frozenset({"callout", "citations", "accordion", "next_questions", "notice", "decision", "form"})
+
+
+def _verify_trusted_blocks(ui_data: Json) -> bool:
+    """Klopt de HMAC van de GenUI-agent over zijn blocks? False als de feature uitstaat."""
+    if not GENUI_TRUSTED_SECRET:
+        return False
+    sig = ui_data.get("_trusted")
+    blocks = ui_data.get("blocks")
+    if not isinstance(sig, str) or not isinstance(blocks, list):
+        return False
+    payload = json.dumps(blocks, separators=(",", ":"), sort_keys=True).encode("utf-8")
+    expected = hmac.new(GENUI_TRUSTED_SECRET.encode("utf-8"), payload, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(sig, expected)
 
 
-def _safe_str(value: Any, *, max_len: int = 4000) -> str:
-    s = "" if value is None else str(value)
+def _safe_str(value: Any, max_len: int = 4000) -> str:
+    # Hot path van de sanitizers: exacte type-check i.p.v. str() op strings
+    # en vroege returns vermijden tussenliggende allocaties.
+    if value is None:
+        return ""
+    s = value if type(value) is str else str(value)
+    if not s:
+        return s
     s = s.strip()
-    if len(s) > max_len:
-        s = s[: max_len - 1] + "…"
-    return s
+    if len(s) <= max_len:
+        return s
+    return s[: max_len - 1] + "…"
+
+
+def _first_str(d: Json, keys: tuple, default: str = "", *, max_len: int = 4000) -> str:
+    """Return the first truthy value among keys, sanitized; walks the dict once."""
+    for k in keys:
+        v = d.get(k)
+        if v:
+            return _safe_str(v, max_len)
+    return default
+
+
+def _items_of(resp: Any, key: str = "items") -> List[Json]:
+    """Lijstveld uit een tool/agent-response, met shape-checks op één plek."""
+    if isinstance(resp, dict):
+        items = resp.get(key)
+        if isinstance(items, list):
+            return items
+    return []
 
 
 def _sanitize_citations_items(items: Any, *, max_items: int = 10) -> List[Json]:
     out: List[Json] = []
     if not isinstance(items, list):
         return out
-    for it in items[:max_items]:
+    for it in islice(items, max_items):
         if not isinstance(it, dict):
             continue
         out.append(
             {
-                "title": _safe_str(it.get("title") or it.get("url") or ""),
-                "url": _safe_str(it.get("url") or ""),
-                "snippet": _safe_str(it.get("snippet") or "", max_len=800),
+                "title": _first_str(it, ("title", "url")),
+                "url": _safe_str(it.get("url")),
+                "snippet": _safe_str(it.get("snippet"), 800),
             }
         )
     return out
@@ -242,11 +629,11 @@ def _sanitize_qa_items(items: Any, *, max_items: int = 8) -> List[Json]:
     out: List[Json] = []
     if not isinstance(items, list):
         return out
-    for it in items[:max_items]:
+    for it in islice(items, max_items):
         if not isinstance(it, dict):
             continue
-        q = _safe_str(it.get("q") or it.get("question") or "", max_len=300)
-        a = _safe_str(it.get("a") or it.get("answer") or "", max_len=2000)
+        q = _first_str(it, ("q", "question"), max_len=300)
+        a = _first_str(it, ("a", "answer"), max_len=2000)
         if not q and not a:
             continue
         out.append({"q": q, "a": a})
@@ -257,8 +644,8 @@ def _sanitize_next_questions(items: Any, *, max_items: int = 8) -> List[str]:
     out: List[str] = []
     if not isinstance(items, list):
         return out
-    for it in items[:max_items]:
-        q = _safe_str(it, max_len=200)
+    for it in islice(items, max_items):
+        q = _safe_str(it, 200)
         if q:
             out.append(q)
     return out
@@ -267,48 +654,57 @@ def _sanitize_next_questions(items: Any, *, max_items: int = 8) -> List[str]:
 def _sanitize_decision_options(options: Any, *, max_items: int = 6) -> List[str]:
     out: List[str] = []
     if isinstance(options, list):
-        for it in options[:max_items]:
+        for it in islice(options, max_items):
             if isinstance(it, dict):
-                label = _safe_str(it.get("label") or it.get("text") or it.get("value") or "", max_len=80)
+                label = _first_str(it, ("label", "text", "value"), max_len=80)
             else:
-                label = _safe_str(it, max_len=80)
+                label = _safe_str(it, 80)
             if label:
                 out.append(label)
     return out
 
 
+_FTYPES = frozenset({"text", "number", "date", "email", "textarea", "select"})
+
+
+def _norm_ftype(v: Any) -> str:
+    # Enum-achtig veld: geen _safe_str-allocatie nodig, alleen een frozenset-
+    # lookup; alles wat onbekend is wordt "text".
+    if not isinstance(v, str):
+        return "text"
+    v = v.strip().lower()
+    return v if v in _FTYPES else "text"
+
 
 def _sanitize_form_fields(fields: Any, *, max_fields: int = 10) -> List[Json]:
     out: List[Json] = []
     if not isinstance(fields, list):
         return out
-    for f in fields[:max_fields]:
+    for f in islice(fields, max_fields):
         if not isinstance(f, dict):
             continue
-        fid = _safe_str(f.get("id") or "", max_len=40)
+        fid = _safe_str(f.get("id"), 40)
         if not fid:
             continue
-        ftype = _safe_str(f.get("type") or "text", max_len=20).lower()
-        if ftype not in ("text", "number", "date", "email", "textarea", "select"):
-            ftype = "text"
+        ftype = _norm_ftype(f.get("type"))
 
         options = f.get("options") or []
         if not isinstance(options, list):
             options = []
         options_s: List[str] = []
-        for o in options[:12]:
-            label = _safe_str(o, max_len=80)
+        for o in islice(options, 12):
+            label = _safe_str(o, 80)
             if label:
                 options_s.append(label)
 
         out.append(
             {
                 "id": fid,
-                "label": _safe_str(f.get("label") or fid, max_len=120),
+                "label": _safe_str(f.get("label") or fid, 120),
                 "type": ftype,
                 "required": bool(f.get("required", False)),
-                "placeholder": _safe_str(f.get("placeholder") or "", max_len=160),
-                "pattern": _safe_str(f.get("pattern") or "", max_len=120),
+                "placeholder": _safe_str(f.get("placeholder"), 160),
+                "pattern": _safe_str(f.get("pattern"), 120),
                 "min": f.get("min"),
                 "max": f.get("max"),
                 "minLength": f.get("minLength"),
@@ -319,97 +715,103 @@ def _sanitize_form_fields(fields: Any, *, max_fields: int = 10) -> List[Json]:
     return out
 
 
-def _sanitize_genui_blocks(blocks: Any, *, max_blocks: int = 12) -> List[Json]:
-    """Accept only known block kinds and coerce fields to a safe shape."""
-    if not isinstance(blocks, list):
-        return []
+def _san_callout(b: Json) -> Json:
+    return {
+        "kind": "callout",
+        "title": _safe_str(b.get("title") or "Kern", 140),
+        "body": _first_str(b, ("body", "text"), max_len=4000),
+    }
 
-    out: List[Json] = []
-    for b in blocks[:max_blocks]:
-        if not isinstance(b, dict):
-            continue
-        kind = _safe_str(b.get("kind") or "").lower()
-        if kind not in GENUI_ALLOWED_KINDS:
-            continue
 
-        if kind == "callout":
-            out.append(
-                {
-                    "kind": "callout",
-                    "title": _safe_str(b.get("title") or "Kern", max_len=140),
-                    "body": _safe_str(b.get("body") or b.get("text") or "", max_len=4000),
-                }
-            )
-            continue
+def _san_citations(b: Json) -> Json:
+    return {
+        "kind": "citations",
+        "title": _safe_str(b.get("title") or "Bronnen", 140),
+        "items": _sanitize_citations_items(b.get("items") or []),
+    }
 
-        if kind == "citations":
-            out.append(
-                {
-                    "kind": "citations",
-                    "title": _safe_str(b.get("title") or "Bronnen", max_len=140),
-                    "items": _sanitize_citations_items(b.get("items") or []),
-                }
-            )
-            continue
 
-        if kind == "accordion":
-            out.append(
-                {
-                    "kind": "accordion",
-                    "title": _safe_str(b.get("title") or "Veelgestelde vragen", max_len=140),
-                    "items": _sanitize_qa_items(b.get("items") or []),
-                }
-            )
-            continue
+def _san_accordion(b: Json) -> Json:
+    return {
+        "kind": "accordion",
+        "title": _safe_str(b.get("title") or "Veelgestelde vragen", 140),
+        "items": _sanitize_qa_items(b.get("items") or []),
+    }
 
-        if kind == "next_questions":
-            out.append(
-                {
-                    "kind": "next_questions",
-                    "title": _safe_str(b.get("title") or "Vervolgvraag", max_len=140),
-                    "items": _sanitize_next_questions(b.get("items") or []),
-                }
-            )
-            continue
 
+def _san_next_questions(b: Json) -> Json:
+    return {
+        "kind": "next_questions",
+        "title": _safe_str(b.get("title") or "Vervolgvraag", 140),
+        "items": _sanitize_next_questions(b.get("items") or []),
+    }
 
-        if kind == "decision":
-            out.append(
-                {
-                    "kind": "decision",
-                    "title": _safe_str(b.get("title") or "Keuze", max_len=140),
-                    "question": _safe_str(b.get("question") or b.get("q") or "Kies een optie", max_len=240),
-                    "options": _sanitize_decision_options(b.get("options") or b.get("items") or []),
-                }
-            )
-            continue
 
+def _san_decision(b: Json) -> Json:
+    return {
+        "kind": "decision",
+        "title": _safe_str(b.get("title") or "Keuze", 140),
+        "question": _first_str(b, ("question", "q"), "Kies een optie", max_len=240),
+        "options": _sanitize_decision_options(b.get("options") or b.get("items") or []),
+    }
 
 
-        if kind == "form":
-            out.append(
-                {
-                    "kind": "form",
-                    "title": _safe_str(b.get("title") or "Formulier", max_len=140),
-                    "formId": _safe_str(b.get("formId") or b.get("id") or "form", max_len=40),
-                    "description": _safe_str(b.get("description") or "", max_len=400),
-                    "submitLabel": _safe_str(b.get("submitLabel") or "Verstuur", max_len=60),
-                    "fields": _sanitize_form_fields(b.get("fields") or []),
-                }
-            )
-            continue
+def _san_form(b: Json) -> Json:
+    return {
+        "kind": "form",
+        "title": _safe_str(b.get("title") or "Formulier", 140),
+        "formId": _first_str(b, ("formId", "id"), "form", max_len=40),
+        "description": _safe_str(b.get("description"), 400),
+        "submitLabel": _safe_str(b.get("submitLabel") or "Verstuur", 60),
+        "fields": _sanitize_form_fields(b.get("fields") or []),
+    }
 
 
-        if kind == "notice":
-            out.append(
-                {
-                    "kind": "notice",
-                    "title": _safe_str(b.get("title") or "Let op", max_len=140),
-                    "body": _safe_str(b.get("body") or "", max_len=1200),
-                }
-            )
-            continue
+def _san_notice(b: Json) -> Json:
+    return {
+        "kind": "notice",
+        "title": _safe_str(b.get("title") or "Let op", 140),
+        "body": _safe_str(b.get("body"), 1200),
+    }
+
+
+# Dispatch table: one dict lookup per block i.p.v. een if/elif-keten; de
+# keys vormen meteen de whitelist (zelfde set als GENUI_ALLOWED_KINDS).
+_BLOCK_BUILDERS: Dict[str, Any] = {
+    "callout": _san_callout,
+    "citations": _san_citations,
+    "accordion": _san_accordion,
+    "next_questions": _san_next_questions,
+    "decision": _san_decision,
+    "form": _san_form,
+    "notice": _san_notice,
+}
+
 
+# Veelgebruikte filterset: flows tonen uitsluitend het MCP-citations-blok en
+# weren agent-citations al tijdens de sanitize-pass (geen tweede lijstscan).
+_SKIP_CITATIONS = frozenset({"citations"})
+
+
+def _sanitize_genui_blocks(blocks: Any, *, max_blocks: int = 12, skip_kinds: frozenset = frozenset()) -> List[Json]:
+    """Accept only known block kinds and coerce fields to a safe shape."""
+    if not isinstance(blocks, list):
+        return []
+
+    builders = _BLOCK_BUILDERS
+    out: List[Json] = []
+    for b in islice(blocks, max_blocks):
+        if not isinstance(b, dict):
+            continue
+        kind = b.get("kind")
+        if not isinstance(kind, str):
+            continue
+        kind = kind.strip().lower()
+        if kind in skip_kinds:
+            continue
+        builder = builders.get(kind)
+        if builder is not None:
+            out.append(builder(b))
     return out
 
 
@@ -418,24 +820,105 @@ async def health():
     return {"ok": True}
 
 
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_frame(msg: Json) -> bytes:
+    """Serialize one SSE frame; orjson when available, compact stdlib otherwise."""
+    if orjson is not None:
+        payload = orjson.dumps(msg)
+    else:
+        payload = json.dumps(msg, separators=(",", ":")).encode("utf-8")
+    return _SSE_PREFIX + payload + _SSE_SUFFIX
+
+
+# Het session/created-frame heeft een vaste vorm; alleen het sessie-id (een
+# uuid, dus veilig zonder JSON-escaping) wordt ingevuld. Pure bytes-concat,
+# geen encoder-call per nieuwe verbinding.
+_SESSION_CREATED_PREFIX = b'data: {"kind":"session/created","sessionId":"'
+_SESSION_CREATED_SUFFIX = b'"}\n\n'
+
+
 @app.get("/events")
 async def events(request: Request):
     session = await hub.create()
 
     async def gen():
-        yield f"data: {JSONResponse(content={'kind':'session/created','sessionId':session.session_id}).body.decode('utf-8')}\n\n"
+        yield _SESSION_CREATED_PREFIX + session.session_id.encode("ascii") + _SESSION_CREATED_SUFFIX
         await _send_open_surface(session.session_id, "home", "Overheid Assistants", _home_surface_model())
 
-        while True:
-            if await request.is_disconnected():
-                break
-            try:
-                msg = await asyncio.wait_for(session.queue.get(), timeout=1.0)
-            except asyncio.TimeoutError:
-                continue
-            yield f"data: {JSONResponse(content=msg).body.decode('utf-8')}\n\n"
+        async def watch_disconnect() -> None:
+            # Maakt de queue-consumer direct wakker bij een wegvallende
+            # client, zodat de lus niet elke seconde hoeft te pollen.
+            while True:
+                message = await request.receive()
+                if message["type"] == "http.disconnect":
+                    try:
+                        session.queue.put_nowait(DISCONNECT_SENTINEL)
+                    except asyncio.QueueFull:
+                        # Maak plaats zodat de consumer de sentinel
+                        # gegarandeerd ziet (zelfde beleid als hub.drop).
+                        try:
+                            session.queue.get_nowait()
+                        except asyncio.QueueEmpty:
+                            pass
+                        session.queue.put_nowait(DISCONNECT_SENTINEL)
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            while True:
+                # Puur awaiten: de watcher garandeert een wakeup (sentinel)
+                # bij disconnect, dus geen timeout/poll-cyclus meer nodig.
+                msg = await session.queue.get()
+                if msg is DISCONNECT_SENTINEL or msg.get("kind") == "_disconnect":
+                    break
+                yield _sse_frame(msg)
+        finally:
+            watcher.cancel()
+            await hub.drop(session.session_id)
+
+    return StreamingResponse(
+        gen(),
+        media_type="text/event-stream",
+        headers={
+            # Voorkom buffering door tussenliggende proxies (nginx e.d.),
+            # zodat elk statusframe direct bij de browser aankomt.
+            "X-Accel-Buffering": "no",
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        },
+    )
 
-    return StreamingResponse(gen(), media_type="text/event-stream")
+
+# Toelatingsbegrenzing voor flows: een burst aan client-events mag niet
+# onbeperkt veel gelijktijdige flow-taken (en dus MCP/A2A-verkeer) starten.
+# De set houdt referenties vast zodat taken niet door de GC verdwijnen.
+_flow_sem = asyncio.Semaphore(int(os.getenv("ORCH_MAX_FLOWS", "32")))
+_active_flows: set = set()
+
+
+def _flow_done(t: "asyncio.Task[Any]") -> None:
+    _active_flows.discard(t)
+    if t.cancelled():
+        return
+    exc = t.exception()
+    if exc is not None:
+        # Voorheen verdween een exception stilletjes met de taakreferentie.
+        log.warning("flow task failed: %r", exc)
+
+
+def _spawn_flow(flow, sid: str, data: Json) -> None:
+    async def _guarded() -> None:
+        async with _flow_sem:
+            await flow(sid, data)
+
+    t = asyncio.create_task(_guarded())
+    _active_flows.add(t)
+    t.add_done_callback(_flow_done)
+    # Koppel de taak aan de sessie zodat een disconnect lopende flows stopt.
+    hub.register_task(sid, t)
 
 
 @app.post("/api/client-event")
@@ -451,61 +934,24 @@ async def client_event(payload: Json = Body(...)):
     data = payload.get("payload") or {}
 
     if name == "nav/open":
-        target = data.get("surfaceId")
-        if target == "toeslagen":
-            await _send_open_surface(sid, "toeslagen", "Toeslagen Check", _empty_surface_model("A2UI: Vul de gegevens in en klik op Check."))
-        elif target == "bezwaar":
-            await _send_open_surface(sid, "bezwaar", "Bezwaar Assistent", _empty_surface_model("A2UI: Plak een bezwaarbrief en klik op Analyseer."))
-        elif target == "genui_search":
-            await _send_open_surface(sid, "genui_search", "Generatieve UI — Zoeken", _empty_surface_model("A2UI: Stel een vraag en klik op Zoek."))
-        elif target == "genui_form":
-            await _send_open_surface(sid, "genui_form", "Generatieve UI — Formulier", _empty_surface_model("A2UI: Stel een vraag en klik op Genereer formulier."))
-        elif target == "genui_tree":
-            await _send_open_surface(sid, "genui_tree", "Generatieve UI — Wizard", _empty_surface_model("A2UI: Start de wizard…"))
-            asyncio.create_task(run_genui_tree_start_flow(sid, {}))
-        else:
+        nav = _NAV_SURFACES.get(data.get("surfaceId"))
+        if nav is None:
             await _send_open_surface(sid, "home", "Overheid Assistants", _home_surface_model())
-        return {"ok": True}
-
-    if name == "toeslagen/check":
-        asyncio.create_task(run_toeslagen_flow(sid, data))
+        else:
+            surface_id, title, message = nav
+            await _send_open_surface(sid, surface_id, title, _empty_surface_model(message))
+            if surface_id == "genui_tree":
+                _spawn_flow(run_genui_tree_start_flow, sid, {})
         return {"ok": True}
 
     if name == "toeslagen/reset":
-        await _send_open_surface(
-            sid,
-            "toeslagen",
-            "Toeslagen Check",
-            _empty_surface_model("A2UI: Vul de gegevens in en klik op Check."),
-        )
-        return {"ok": True}
-
-    if name == "bezwaar/analyse":
-        asyncio.create_task(run_bezwaar_flow(sid, data))
-        return {"ok": True}
-
-    if name == "genui/search":
-        asyncio.create_task(run_genui_search_flow(sid, data))
-        return {"ok": True}
-
-    if name in ("genui/form_generate", "genui_form/generate", "genui_form/generate_form"):
-        asyncio.create_task(run_genui_form_generate_flow(sid, data))
-        return {"ok": True}
-
-    if name in ("genui/form_submit", "genui_form/submit", "genui_form/form_submit"):
-        asyncio.create_task(run_genui_form_submit_flow(sid, data))
-        return {"ok": True}
-
-    if name in ("genui/form_change", "genui_form/change", "genui_form/form_change"):
-        asyncio.create_task(run_genui_form_change_flow(sid, data))
-        return {"ok": True}
-
-    if name == "genui_tree/start":
-        asyncio.create_task(run_genui_tree_start_flow(sid, data))
+        surface_id, title, message = _NAV_SURFACES["toeslagen"]
+        await _send_open_surface(sid, surface_id, title, _empty_surface_model(message))
         return {"ok": True}
 
-    if name == "genui_tree/choose":
-        asyncio.create_task(run_genui_tree_choose_flow(sid, data))
+    flow = _EVENT_FLOWS.get(name)
+    if flow is not None:
+        _spawn_flow(flow, sid, data)
         return {"ok": True}
 
     return {"ok": True, "ignored": True}
@@ -517,7 +963,7 @@ async def client_event(payload: Json = Body(...)):
 
 async def run_toeslagen_flow(sid: str, inputs: Json) -> None:
     surface_id = "toeslagen"
-    await _send_open_surface(sid, surface_id, "Toeslagen Check", _empty_surface_model("A2UI: Nieuwe run gestart. Bezig met verwerken…"))
+    await _send_open_surface(sid, surface_id, "Toeslagen Check", _empty_surface_model("A2UI: Nieuwe run gestart. Bezig met verwerken…", "toeslagen"))
     await _sleep_tick()
 
     regeling = inputs.get("regeling", "Huurtoeslag")
@@ -525,52 +971,59 @@ async def run_toeslagen_flow(sid: str, inputs: Json) -> None:
     situatie = inputs.get("situatie", "Alleenstaand")
     loon_of_vermogen = bool(inputs.get("loonOfVermogen", True))
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Voorwaarden ophalen (MCP)…", step="rules_lookup")
-    await _sleep_tick()
-    voorwaarden = await _mcp_call_with_trace(sid, surface_id, "rules_lookup", {"regeling": regeling, "jaar": jaar}, step="rules_lookup")
-
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Checklist samenstellen…", step="doc_checklist")
-    await _sleep_tick()
-    checklist = await _mcp_call_with_trace(sid, surface_id, "doc_checklist", {"regeling": regeling, "situatie": situatie}, step="doc_checklist")
-    docs = checklist.get("documenten", [])
-
-    await _set_results(sid, surface_id, [{"kind": "documenten", "title": "Benodigde Documenten", "items": docs[:3]}])
-    await _sleep_tick()
-
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Aandachtspunten berekenen…", step="risk_notes")
-    await _sleep_tick()
-    notes = await _mcp_call_with_trace(
-        sid, surface_id, "risk_notes",
-        {"regeling": regeling, "jaar": jaar, "situatie": situatie, "loonOfVermogen": loon_of_vermogen},
-        step="risk_notes",
+    # De drie MCP-tools zijn onafhankelijk van elkaar; parallel uitvoeren
+    # maakt de wachttijd max(calls) in plaats van sum(calls).
+    await _set_status(sid, surface_id, loading=True, message="A2UI: Voorwaarden, checklist en aandachtspunten ophalen (MCP)…", step="rules_lookup")
+    voorwaarden, checklist, notes = await asyncio.gather(
+        _mcp_call_with_trace(
+            sid, surface_id, "rules_lookup", {"regeling": regeling, "jaar": jaar},
+            step="rules_lookup",
+        ),
+        _mcp_call_with_trace(
+            sid, surface_id, "doc_checklist", {"regeling": regeling, "situatie": situatie},
+            step="doc_checklist",
+        ),
+        _mcp_call_with_trace(
+            sid, surface_id, "risk_notes",
+            {"regeling": regeling, "jaar": jaar, "situatie": situatie, "loonOfVermogen": loon_of_vermogen},
+            step="risk_notes",
+        ),
     )
+    # Eén keer extraheren en de blok-dicts als locals hergebruiken; ze gaan
+    # by-reference de patch-queue in.
+    voorw_list = voorwaarden.get("voorwaarden", [])
+    docs = checklist.get("documenten", [])
     risks = notes.get("aandachtspunten", [])
+    docs_block: Json = {"kind": "documenten", "title": "Benodigde Documenten", "items": docs}
+    risks_block: Json = {"kind": "aandachtspunten", "title": "Aandachtspunten", "items": risks}
 
-    await _set_results(sid, surface_id, [
-        {"kind": "documenten", "title": "Benodigde Documenten", "items": docs},
-        {"kind": "aandachtspunten", "title": "Aandachtspunten", "items": risks},
-    ])
-    await _sleep_tick()
-
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Uitleg in B1 (A2A)…", step="explain_toeslagen")
+    # Progressive reveal via delta-appends: de baseline is één replace, elk
+    # volgend blok gaat als add-op zodat eerdere blokken niet opnieuw over
+    # de draad hoeven.
+    await _set_results(sid, surface_id, [docs_block])
     await _sleep_tick()
+    await _append_results(sid, surface_id, [risks_block])
 
-    combined_items: List[Json] = [{"category": "document", "text": d} for d in docs] + [{"category": "aandachtspunt", "text": r} for r in risks]
+    combined_items: List[Json] = [
+        *({"category": "document", "text": d} for d in docs),
+        *({"category": "aandachtspunt", "text": r} for r in risks),
+    ]
     enriched = await _a2a_call_with_trace(
         sid,
         surface_id,
         a2a_toes,
         "explain_toeslagen",
-        {"inputs": {"regeling": regeling, "jaar": jaar, "situatie": situatie, "voorwaarden": voorwaarden.get("voorwaarden", [])}, "items": combined_items},
-        step="explain_toeslagen",
+        {"inputs": {"regeling": regeling, "jaar": jaar, "situatie": situatie, "voorwaarden": voorw_list}, "items": combined_items},
+        step="explain_toeslagen", pre_message="A2UI: Uitleg in B1 (A2A)…",
     )
 
-    await _set_results(sid, surface_id, [
-        {"kind": "documenten", "title": "Benodigde Documenten", "items": docs},
-        {"kind": "aandachtspunten", "title": "Aandachtspunten", "items": risks},
-        {"kind": "verrijking", "title": "Verrijking (B1 + prioriteit)", "items": enriched.get("items", [])},
-    ])
-    await _set_status(sid, surface_id, loading=False, message="A2UI: Klaar. Demo-uitkomst (geen besluit).", step="done")
+    # Laatste blok + eindstatus in één SSE-frame.
+    await (
+        _PatchBatch(sid, surface_id)
+        .append_results([{"kind": "verrijking", "title": "Verrijking (B1 + prioriteit)", "items": enriched.get("items", [])}])
+        .status(loading=False, message="A2UI: Klaar. Demo-uitkomst (geen besluit).", step="done")
+        .flush()
+    )
 
 
 # -----------------------
@@ -581,42 +1034,47 @@ async def run_bezwaar_flow(sid: str, inputs: Json) -> None:
     surface_id = "bezwaar"
     text = (inputs.get("text") or "").strip() or "Ik ben het niet eens met de naheffing van €750. Mijn inkomen is te laag voor deze aanslag. Ik vraag om herziening."
 
-    await _send_open_surface(sid, surface_id, "Bezwaar Assistent", _empty_surface_model("A2UI: Nieuwe analyse gestart. Bezig met verwerken…"))
-    await _sleep_tick()
-
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Entiteiten extraheren (MCP)…", step="extract_entities")
+    await _send_open_surface(sid, surface_id, "Bezwaar Assistent", _empty_surface_model("A2UI: Nieuwe analyse gestart. Bezig met verwerken…", "bezwaar"))
     await _sleep_tick()
-    entities = await _mcp_call_with_trace(sid, surface_id, "extract_entities", {"text": text}, step="extract_entities")
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Zaak classificeren (MCP)…", step="classify_case")
-    await _sleep_tick()
-    classification = await _mcp_call_with_trace(sid, surface_id, "classify_case", {"text": text}, step="classify_case")
+    # Entiteiten en classificatie gebruiken allebei alleen de ruwe tekst en
+    # gaan als één JSON-RPC batch; alleen policy_snippets heeft de
+    # classificatie nodig en wacht daarna.
+    await _set_status(sid, surface_id, loading=True, message="A2UI: Entiteiten en classificatie (MCP)…", step="extract_entities")
+    entities, classification = await _mcp_batch_with_trace(
+        sid, surface_id,
+        [("extract_entities", {"text": text}), ("classify_case", {"text": text})],
+        step="extract_entities",
+    )
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Beleidsnippets ophalen (MCP)…", step="policy_snippets")
-    await _sleep_tick()
-    snippets = await _mcp_call_with_trace(sid, surface_id, "policy_snippets", {"type": classification.get("type")}, step="policy_snippets")
+    snippets = await _mcp_call_with_trace(
+        sid, surface_id, "policy_snippets", {"type": classification.get("type")},
+        step="policy_snippets", pre_message="A2UI: Beleidsnippets ophalen (MCP)…",
+    )
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Juridische structuur (A2A)…", step="structure_bezwaar")
-    await _sleep_tick()
     structured = await _a2a_call_with_trace(
         sid,
         surface_id,
         a2a_bez,
         "structure_bezwaar",
         {"raw_text": text, "entities": entities, "classification": classification, "snippets": snippets.get("snippets", [])},
-        step="structure_bezwaar",
+        step="structure_bezwaar", pre_message="A2UI: Juridische structuur (A2A)…",
     )
 
-    await _set_results(sid, surface_id, [{
-        "kind": "bezwaar",
-        "overview": structured.get("overview", {}),
-        "key_points": structured.get("key_points", []),
-        "actions": structured.get("actions", []),
-        "draft_source": structured.get("draft_source"),
-        "draft_response": structured.get("draft_response", ""),
-    }])
-
-    await _set_status(sid, surface_id, loading=False, message="A2UI: Klaar. Conceptreactie opgesteld (demo).", step="done")
+    # Resultaat + eindstatus in één SSE-frame.
+    await (
+        _PatchBatch(sid, surface_id)
+        .replace_results([{
+            "kind": "bezwaar",
+            "overview": structured.get("overview", {}),
+            "key_points": structured.get("key_points", []),
+            "actions": structured.get("actions", []),
+            "draft_source": structured.get("draft_source"),
+            "draft_response": structured.get("draft_response", ""),
+        }])
+        .status(loading=False, message="A2UI: Klaar. Conceptreactie opgesteld (demo).", step="done")
+        .flush()
+    )
 
 
 # -----------------------
@@ -629,21 +1087,38 @@ async def run_genui_search_flow(sid: str, inputs: Json) -> None:
     if not query:
         return
 
-    await _send_open_surface(sid, surface_id, "Generatieve UI — Zoeken", _empty_surface_model("A2UI: Nieuwe zoekrun gestart…"))
+    await _send_open_surface(sid, surface_id, "Generatieve UI — Zoeken", _empty_surface_model("A2UI: Nieuwe zoekrun gestart…", "genui_search"))
     await _sleep_tick()
 
     await _set_status(sid, surface_id, loading=True, message="A2UI: Zoekopdracht ontvangen…", step="start", source="", sourceReason="")
     await _set_results(sid, surface_id, [])
-    await _sleep_tick()
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Bronnen ophalen (MCP)…", step="bd_search")
-    await _sleep_tick()
+    # Warm de A2A-verbinding op terwijl de MCP-zoekopdracht loopt, zodat de
+    # compose-call straks een keep-alive connectie uit de pool pakt.
+    warmup_task = asyncio.create_task(a2a_genui.warmup())
 
-    search_resp = await _mcp_call_with_trace(sid, surface_id, "bd_search", {"query": query, "k": 5}, step="bd_search")
-    citations = search_resp.get("items", []) if isinstance(search_resp, dict) else []
+    search_resp = await _mcp_call_with_trace(
+        sid, surface_id, "bd_search", {"query": query, "k": 5},
+        step="bd_search", pre_message="A2UI: Bronnen ophalen (MCP)…",
+    )
+    citations = _items_of(search_resp)
+    await warmup_task
 
     citations_block: Json = {"kind": "citations", "title": "Bronnen (MCP)", "items": citations}
 
+    # Start compose_ui zodra de citations binnen zijn; de lokale form-state en
+    # citations-pushes hieronder overlappen dan met de A2A-latency in plaats
+    # van erop te wachten.
+    compose_task = asyncio.create_task(
+        _a2a_call_with_trace(
+            sid,
+            surface_id,
+            a2a_genui,
+            "compose_ui",
+            {"query": query, "citations": citations},
+            step="compose_ui", pre_message="A2UI: UI-plan maken (A2A)…",
+        )
+    )
 
     # optimistic_form: always show a usable form immediately (even if A2A output is empty)
     try:
@@ -661,27 +1136,15 @@ async def run_genui_search_flow(sid: str, inputs: Json) -> None:
     await _set_form_state(
         sid,
         surface_id,
-        {"query": query, "citations": citations, "base_form": base_form, "form": base_form},
+        FormState(query=query, citations=citations, base_form=base_form, form=base_form),
     )
 
-    await _set_results(sid, surface_id, _sanitize_genui_blocks([citations_block, base_form]))
-
-    # progressive: show citations first
-    await _set_results(sid, surface_id, [citations_block])
-    await _sleep_tick()
-
-    await _set_status(sid, surface_id, loading=True, message="A2UI: UI-plan maken (A2A)…", step="compose_ui")
-    await _sleep_tick()
+    # progressive: show citations first; alles daarna gaat als delta-append
+    # (add-op per blok) in plaats van telkens de hele results-array opnieuw.
+    await _set_results(sid, surface_id, [citations_block] if citations else [])
 
     try:
-        ui_raw = await _a2a_call_with_trace(
-            sid,
-            surface_id,
-            a2a_genui,
-            "compose_ui",
-            {"query": query, "citations": citations},
-            step="compose_ui",
-        )
+        ui_raw = await compose_task
 
         # GenUI agent returns {"status":"ok","data":{...}}
         ui_data = ui_raw.get("data") if isinstance(ui_raw, dict) and isinstance(ui_raw.get("data"), dict) else ui_raw
@@ -689,40 +1152,40 @@ async def run_genui_search_flow(sid: str, inputs: Json) -> None:
             ui_data = {}
 
         blocks_raw = ui_data.get("blocks", [])
-        blocks = _sanitize_genui_blocks(blocks_raw)
+        # Alleen het MCP-citations-blok wordt getoond; agent-citations vallen
+        # al tijdens de (whitelist-)pass af in plaats van in een tweede scan.
+        if _verify_trusted_blocks(ui_data):
+            # Schema is upstream al afgedwongen; alleen de kind-whitelist blijft.
+            blocks = [b for b in blocks_raw if isinstance(b, dict) and b.get("kind") in GENUI_ALLOWED_KINDS and b.get("kind") != "citations"]
+        else:
+            blocks = _sanitize_genui_blocks(blocks_raw, skip_kinds=_SKIP_CITATIONS)
 
         blocks = _ensure_form_block(blocks, query)
 
-        # Prefer a single citations block from MCP (avoid duplicates from the agent output)
-        blocks = [b for b in blocks if b.get("kind") != "citations"]
-
-        ui_source = _safe_str(ui_data.get("ui_source", "unknown"), max_len=40).lower()
+        ui_source = _safe_str(ui_data.get("ui_source", "unknown"), 40).lower()
         if ui_source not in ("gemini", "fallback"):
             ui_source = "unknown"
-        ui_reason = _safe_str(ui_data.get("ui_source_reason", ""), max_len=80)
-
-        await _set_status(sid, surface_id, source=ui_source, sourceReason=ui_reason)
-
-        merged: List[Json] = []
-        if citations:
-            merged.append(citations_block)
-        merged.extend(blocks)
-
-        if len(merged) == (1 if citations else 0):
-            merged.append({"kind": "notice", "title": "GenUI", "body": "Geen GenUI-blokken gegenereerd; alleen bronnen getoond (demo)."})
-        await _set_results(sid, surface_id, merged)
+        ui_reason = _safe_str(ui_data.get("ui_source_reason", ""), 80)
 
-        await _set_status(sid, surface_id, loading=False, message="A2UI: Klaar. (GenUI)", step="done")
+        if not blocks:
+            blocks = [{"kind": "notice", "title": "GenUI", "body": "Geen GenUI-blokken gegenereerd; alleen bronnen getoond (demo)."}]
+
+        # Bron-status, blokken en eindstatus in één SSE-frame.
+        await (
+            _PatchBatch(sid, surface_id)
+            .status(source=ui_source, sourceReason=ui_reason)
+            .append_results(blocks)
+            .status(loading=False, message="A2UI: Klaar. (GenUI)", step="done")
+            .flush()
+        )
     except Exception:
-        await _set_status(sid, surface_id, source="fallback", sourceReason="a2a_down_or_error")
-
-        merged: List[Json] = []
-        if citations:
-            merged.append(citations_block)
-        merged.append({"kind": "notice", "title": "GenUI", "body": "A2A genui-agent niet bereikbaar; fallback actief."})
-        await _set_results(sid, surface_id, merged)
-
-        await _set_status(sid, surface_id, loading=False, message="A2UI: Klaar. (GenUI fallback)", step="done")
+        await (
+            _PatchBatch(sid, surface_id)
+            .status(source="fallback", sourceReason="a2a_down_or_error")
+            .append_results([{"kind": "notice", "title": "GenUI", "body": "A2A genui-agent niet bereikbaar; fallback actief."}])
+            .status(loading=False, message="A2UI: Klaar. (GenUI fallback)", step="done")
+            .flush()
+        )
 
 
 # -----------------------
@@ -790,12 +1253,7 @@ async def run_genui_tree_start_flow(sid: str, inputs: Json) -> None:
             "title": "Wizard (demo)",
             "body": "Beantwoord een paar korte vragen. Op basis daarvan tonen we relevante info en vervolgstappen (demo, geen besluit).",
         },
-        {
-            "kind": "decision",
-            "title": "Stap 1",
-            "question": "Waar gaat uw vraag over?",
-            "options": ["Bezwaar maken", "Betalen", "Toeslagen", "Contact", "Anders"],
-        },
+        _WIZARD_START_DECISION,
     ]
 
     await _set_results(sid, surface_id, blocks)
@@ -804,7 +1262,7 @@ async def run_genui_tree_start_flow(sid: str, inputs: Json) -> None:
 
 async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
     surface_id = "genui_tree"
-    choice = _safe_str(inputs.get("option") or inputs.get("choice") or inputs.get("value") or "", max_len=120)
+    choice = _safe_str(inputs.get("option") or inputs.get("choice") or inputs.get("value"), 120)
     if not choice:
         return
 
@@ -829,24 +1287,26 @@ async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
         pass
 
     await _set_status(sid, surface_id, loading=True, message=f"A2UI: Keuze ontvangen: {choice}", step="tree_choose")
-    await _sleep_tick()
 
     # 1) MCP citations for this step (deterministic)
     query = _tree_query_from_state(state, choice)
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Bronnen ophalen (MCP)…", step="bd_search")
-    await _sleep_tick()
 
-    search_resp = await _mcp_call_with_trace(sid, surface_id, "bd_search", {"query": query, "k": 5}, step="bd_search")
-    citations = search_resp.get("items", []) if isinstance(search_resp, dict) else []
+    # Warm de A2A-verbinding op terwijl de MCP-zoekopdracht loopt, zodat de
+    # compose-call straks een keep-alive connectie uit de pool pakt.
+    warmup_task = asyncio.create_task(a2a_genui.warmup())
+
+    search_resp = await _mcp_call_with_trace(
+        sid, surface_id, "bd_search", {"query": query, "k": 5},
+        step="bd_search", pre_message="A2UI: Bronnen ophalen (MCP)…",
+    )
+    citations = _items_of(search_resp)
+    await warmup_task
     citations_block: Json = {"kind": "citations", "title": "Bronnen (MCP)", "items": citations}
 
     # Progressive: show citations first
     await _set_results(sid, surface_id, [citations_block] if citations else [])
-    await _sleep_tick()
 
     # 2) A2A decision step (deterministic fallback inside the GenUI agent)
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Volgende stap bepalen (A2A)…", step="next_node")
-    await _sleep_tick()
 
     try:
         ui_raw = await _a2a_call_with_trace(
@@ -855,7 +1315,7 @@ async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
             a2a_genui,
             "next_node",
             {"state": state, "choice": choice, "citations": citations},
-            step="next_node",
+            step="next_node", pre_message="A2UI: Volgende stap bepalen (A2A)…",
         )
 
         ui_data = ui_raw.get("data") if isinstance(ui_raw, dict) and isinstance(ui_raw.get("data"), dict) else ui_raw
@@ -863,15 +1323,13 @@ async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
             ui_data = {}
 
         blocks_raw = ui_data.get("blocks", [])
-        blocks = _sanitize_genui_blocks(blocks_raw)
+        # Prefer citations from MCP only; skip agent citations during the walk.
+        blocks = _sanitize_genui_blocks(blocks_raw, skip_kinds=_SKIP_CITATIONS)
 
-        # Prefer citations from MCP only
-        blocks = [b for b in blocks if b.get("kind") != "citations"]
-
-        ui_source = _safe_str(ui_data.get("ui_source", "fallback"), max_len=40).lower()
+        ui_source = _safe_str(ui_data.get("ui_source", "fallback"), 40).lower()
         if ui_source not in ("gemini", "fallback"):
             ui_source = "fallback"
-        ui_reason = _safe_str(ui_data.get("ui_source_reason", "deterministic_tree"), max_len=80)
+        ui_reason = _safe_str(ui_data.get("ui_source_reason", "deterministic_tree"), 80)
 
         new_state = ui_data.get("tree")
         if isinstance(new_state, dict):
@@ -903,14 +1361,7 @@ async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
         if citations:
             merged.append(citations_block)
         merged.append({"kind": "notice", "title": "Wizard", "body": "A2A genui-agent niet bereikbaar; wizard valt terug op start."})
-        merged.append(
-            {
-                "kind": "decision",
-                "title": "Stap 1",
-                "question": "Waar gaat uw vraag over?",
-                "options": ["Bezwaar maken", "Betalen", "Toeslagen", "Contact", "Anders"],
-            }
-        )
+        merged.append(_WIZARD_START_DECISION)
         await _set_results(sid, surface_id, merged)
         await _set_status(sid, surface_id, loading=False, message="A2UI: Kies een optie om door te gaan.", step="waiting")
 
@@ -918,19 +1369,43 @@ async def run_genui_tree_choose_flow(sid: str, inputs: Json) -> None:
 # Flow 5: GenUI Form (Form-on-the-fly) — deterministic A2A (compose_form/explain_form) + MCP validate_form
 # -----------------------
 
-def _form_default_state() -> Json:
-    return {"query": "", "citations": [], "form": None}
+@dataclass(slots=True)
+class FormState:
+    """Typed form-flow state; stored in the surface model as a plain dict."""
+
+    query: str = ""
+    citations: List[Json] = field(default_factory=list)
+    base_form: Optional[Json] = None
+    form: Optional[Json] = None
+
+    def to_model(self) -> Json:
+        return {"query": self.query, "citations": self.citations, "base_form": self.base_form, "form": self.form}
+
+    @classmethod
+    def from_model(cls, value: Any) -> Optional["FormState"]:
+        if not isinstance(value, dict):
+            return None
+        citations = value.get("citations")
+        base_form = value.get("base_form")
+        form = value.get("form")
+        return cls(
+            query=str(value.get("query") or ""),
+            citations=citations if isinstance(citations, list) else [],
+            base_form=base_form if isinstance(base_form, dict) else None,
+            form=form if isinstance(form, dict) else None,
+        )
+
+
+def _form_default_state() -> FormState:
+    return FormState()
 
 
-async def _set_form_state(sid: str, surface_id: str, state: Json) -> None:
-    await hub.push_update_and_apply(sid, surface_id, [{"op": "replace", "path": "/form", "value": state}])
+async def _set_form_state(sid: str, surface_id: str, state: FormState) -> None:
+    await hub.push_update_and_apply(sid, surface_id, [{"op": "replace", "path": "/form", "value": state.to_model()}])
 
 
 def _extract_first_form_block(blocks: List[Json]) -> Optional[Json]:
-    for b in blocks:
-        if isinstance(b, dict) and b.get("kind") == "form":
-            return b
-    return None
+    return next((b for b in blocks if isinstance(b, dict) and b.get("kind") == "form"), None)
 
 
 def _extract_base_form(form_block: Json) -> Json:
@@ -959,13 +1434,13 @@ def _boost_query(query: str) -> str:
     low = q.lower()
     expansions: list[str] = []
 
-    if any(k in low for k in ["bezwaar", "bezwaarschrift", "beroep"]):
+    if _RE_BEZWAAR.search(low):
         expansions += ["bezwaar indienen", "termijn", "uitspraak op bezwaar"]
 
-    if any(k in low for k in ["uitstel", "betalingsregeling", "betaal", "betalen", "incasso"]):
+    if _RE_BETALING.search(low):
         expansions += ["uitstel van betaling", "betalingsregeling", "betaaltermijn"]
 
-    if any(k in low for k in ["toeslag", "toeslagen"]):
+    if _RE_TOESLAG.search(low):
         expansions += ["huurtoeslag", "zorgtoeslag", "kinderopvangtoeslag", "kindgebonden budget", "toeslagpartner"]
 
     extras = [e for e in expansions if e.lower() not in low]
@@ -983,15 +1458,7 @@ def _ensure_form_block(blocks: List[Json], query: str) -> List[Json]:
             if isinstance(fields, list) and len(fields) > 0:
                 return blocks
 
-    q = (query or "").strip()
-    low = q.lower()
-    scenario = "algemeen"
-    if any(k in low for k in ["uitstel", "betalingsregeling", "betaal", "betalen", "incasso"]):
-        scenario = "betaling"
-    elif any(k in low for k in ["bezwaar", "bezwaarschrift", "beroep"]):
-        scenario = "bezwaar"
-    elif "toeslag" in low or "toeslagen" in low:
-        scenario = "toeslagen"
+    scenario = _scenario_of(query)
 
     fields: List[Json] = [
         {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
@@ -1017,18 +1484,6 @@ def _ensure_form_block(blocks: List[Json], query: str) -> List[Json]:
         "fields": fields,
     }
     sanitized = _sanitize_genui_blocks([form_block])
-    return blocks + (sanitized if sanitized else [form_block])    # Deterministic fallback form (minimal)
-    form_block: Json = {
-        "kind": "form",
-        "title": "Gegevens",
-        "formId": "form",
-        "submitLabel": "Verstuur",
-        "fields": [
-            {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
-            {"id": "vraag", "label": "Uw vraag", "type": "text", "required": True, "minLength": 10, "placeholder": "Omschrijf kort uw situatie of vraag (demo)."},
-        ],
-    }
-    sanitized = _sanitize_genui_blocks([form_block])
     return blocks + (sanitized if sanitized else [form_block])
 
 async def run_genui_form_generate_flow(sid: str, inputs: Json) -> None:
@@ -1037,30 +1492,36 @@ async def run_genui_form_generate_flow(sid: str, inputs: Json) -> None:
     if not query:
         return
 
-    await _send_open_surface(sid, surface_id, "Generatieve UI — Formulier", _empty_surface_model("A2UI: Nieuwe run gestart…"))
+    await _send_open_surface(sid, surface_id, "Generatieve UI — Formulier", _empty_surface_model("A2UI: Nieuwe run gestart…", "genui_form"))
     await _sleep_tick()
 
     await _set_form_state(sid, surface_id, _form_default_state())
 
     await _set_status(sid, surface_id, loading=True, message="A2UI: Formulier genereren…", step="start", source="", sourceReason="")
     await _set_results(sid, surface_id, [])
-    await _sleep_tick()
 
     # 1) MCP citations
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Bronnen ophalen (MCP)…", step="bd_search")
-    await _sleep_tick()
 
     q = _boost_query(query)
-    search_resp = await _mcp_call_with_trace(sid, surface_id, "bd_search", {"query": q, "k": 5}, step="bd_search")
-    citations = search_resp.get("items", []) if isinstance(search_resp, dict) else []
+    search_resp = await _mcp_call_with_trace(
+        sid, surface_id, "bd_search", {"query": q, "k": 5},
+        step="bd_search", shared_key=("bd_search", q, 5), pre_message="A2UI: Bronnen ophalen (MCP)…",
+    )
+    citations = _items_of(search_resp)
     citations_block: Json = {"kind": "citations", "title": "Bronnen (MCP)", "items": citations}
 
+    # Progressive: show bronnen + a usable fallback form skeleton while A2A works.
+    skeleton_blocks: List[Json] = [citations_block] if citations else []
+    skeleton_blocks.append(_guaranteed_form_block(query))
+    await _set_results(sid, surface_id, _sanitize_genui_blocks(skeleton_blocks))
+
     # 2) A2A compose_form (deterministic)
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Formulier opstellen (A2A)…", step="compose_form")
-    await _sleep_tick()
 
     try:
-        resp = await _a2a_call_with_trace(sid, surface_id, a2a_genui, "compose_form", {"query": query, "citations": citations}, step="compose_form")
+        resp = await _a2a_call_with_trace(
+            sid, surface_id, a2a_genui, "compose_form", {"query": query, "citations": citations},
+            step="compose_form", shared_key=("compose_form", query), pre_message="A2UI: Formulier opstellen (A2A)…",
+        )
         data = resp.get("data") if isinstance(resp, dict) else None
         blocks_raw = (data.get("blocks") if isinstance(data, dict) else None) or []
         ui_source = (data.get("ui_source") if isinstance(data, dict) else "") or "fallback"
@@ -1087,7 +1548,7 @@ async def run_genui_form_generate_flow(sid: str, inputs: Json) -> None:
             if isinstance(b, dict) and b.get("kind") == "form":
                 blocks[i] = base_form
                 break
-        await _set_form_state(sid, surface_id, {"query": query, "citations": citations, "base_form": base_form, "form": base_form})
+        await _set_form_state(sid, surface_id, FormState(query=query, citations=citations, base_form=base_form, form=base_form))
 
         await _set_status(sid, surface_id, source=str(ui_source), sourceReason=str(ui_reason))
         await _set_results(sid, surface_id, _sanitize_genui_blocks(merged))
@@ -1095,17 +1556,7 @@ async def run_genui_form_generate_flow(sid: str, inputs: Json) -> None:
     except Exception:
         await _set_status(sid, surface_id, source="fallback", sourceReason="a2a_down_or_error")
 
-        form_block = {
-            "kind": "form",
-            "title": "Formulier (demo)",
-            "formId": "contact_v1",
-            "description": "Vul enkele gegevens in. Dit is een deterministische fallback.",
-            "submitLabel": "Verstuur",
-            "fields": [
-                {"id": "email", "label": "E-mailadres", "type": "email", "required": True, "placeholder": "naam@example.nl"},
-                {"id": "toelichting", "label": "Toelichting", "type": "textarea", "required": True, "placeholder": "Beschrijf kort uw vraag."},
-            ],
-        }
+        form_block = _FORM_FALLBACK_BLOCK
 
         merged: List[Json] = []
         if citations:
@@ -1114,13 +1565,11 @@ async def run_genui_form_generate_flow(sid: str, inputs: Json) -> None:
         merged.append(form_block)
 
         base_form = _extract_base_form(form_block)
-        await _set_form_state(sid, surface_id, {"query": query, "citations": citations, "base_form": base_form, "form": base_form})
+        await _set_form_state(sid, surface_id, FormState(query=query, citations=citations, base_form=base_form, form=base_form))
         await _set_results(sid, surface_id, _sanitize_genui_blocks(merged))
         await _set_status(sid, surface_id, loading=False, message="A2UI: Klaar. (Form fallback)", step="waiting")
 
 
-
-
 def _pick_text(values: Dict[str, Any], keys: List[str]) -> str:
     if not isinstance(values, dict):
         return ""
@@ -1151,6 +1600,33 @@ def _pick_amount(values: Dict[str, Any], keys: List[str]) -> float:
         return 0.0
 
 
+# Templates voor de deterministische extra velden (Variant B); één keer gebouwd,
+# per gebruik ondiep gekopieerd zodat downstream-annotaties (badge/label) veilig zijn.
+_EXTRA_FIELD_DAGTEKENING: Json = {"id": "dagtekening", "label": "Dagtekening", "type": "date", "required": False}
+_EXTRA_FIELD_VOORKEUR: Json = {
+    "id": "voorkeur",
+    "label": "Waar gaat uw verzoek over?",
+    "type": "select",
+    "required": False,
+    "options": ["Uitstel aanvragen", "Betalingsregeling aanvragen", "Ik weet het niet"],
+}
+_EXTRA_FIELD_REDEN: Json = {
+    "id": "reden",
+    "label": "Korte toelichting",
+    "type": "textarea",
+    "required": False,
+    "minLength": 15,
+    "placeholder": "Bijv. tijdelijk minder inkomen of onverwachte kosten (demo).",
+}
+_EXTRA_FIELD_ROUTE: Json = {
+    "id": "route",
+    "label": "Hoe wilt u het liefst indienen?",
+    "type": "select",
+    "required": False,
+    "options": ["Online", "Per post", "Weet ik niet"],
+}
+
+
 def _extend_form_fields(existing_fields: List[Json], values: Dict[str, Any], query: str) -> List[Json]:
     """Deterministische extra velden (fallback) voor Variant B.
 
@@ -1163,10 +1639,10 @@ def _extend_form_fields(existing_fields: List[Json], values: Dict[str, Any], que
     ids = {str(f.get("id") or "").strip() for f in out if str(f.get("id") or "").strip()}
 
     def add(field: Json) -> None:
-        fid = str(field.get("id") or "").strip()
-        if not fid or fid in ids:
+        fid = field["id"]
+        if fid in ids:
             return
-        out.append(field)
+        out.append(dict(field))
         ids.add(fid)
 
     qlow = (query or "").lower()
@@ -1174,36 +1650,17 @@ def _extend_form_fields(existing_fields: List[Json], values: Dict[str, Any], que
     kenmerk = _pick_text(values, ["kenmerk", "aanslagnummer", "reference", "kenm"])
     bedrag = _pick_amount(values, ["bedrag", "amount", "eur", "totaal"])
     mot = _pick_text(values, ["motivering", "reden", "toelichting", "reason"])
-    bezwaar = ("bezwaar" in qlow) or ("beroep" in qlow) or bool(mot.strip())
+    bezwaar = ("bezwaar" in qlow) or ("beroep" in qlow) or bool(mot)
 
     if len(kenmerk) >= 6:
-        add({"id": "dagtekening", "label": "Dagtekening", "type": "date", "required": False})
+        add(_EXTRA_FIELD_DAGTEKENING)
 
     if bedrag > 0:
-        add({
-            "id": "voorkeur",
-            "label": "Waar gaat uw verzoek over?",
-            "type": "select",
-            "required": False,
-            "options": ["Uitstel aanvragen", "Betalingsregeling aanvragen", "Ik weet het niet"],
-        })
-        add({
-            "id": "reden",
-            "label": "Korte toelichting",
-            "type": "textarea",
-            "required": False,
-            "minLength": 15,
-            "placeholder": "Bijv. tijdelijk minder inkomen of onverwachte kosten (demo).",
-        })
+        add(_EXTRA_FIELD_VOORKEUR)
+        add(_EXTRA_FIELD_REDEN)
 
     if bezwaar:
-        add({
-            "id": "route",
-            "label": "Hoe wilt u het liefst indienen?",
-            "type": "select",
-            "required": False,
-            "options": ["Online", "Per post", "Weet ik niet"],
-        })
+        add(_EXTRA_FIELD_ROUTE)
 
     return out
 
@@ -1218,22 +1675,18 @@ async def run_genui_form_change_flow(sid: str, inputs: Json) -> None:
     if not s:
         return
     model = s.get_model(surface_id)
-    form_state = model.get("form") if isinstance(model, dict) else None
-    if not isinstance(form_state, dict):
+    form_state = FormState.from_model(model.get("form") if isinstance(model, dict) else None)
+    if form_state is None:
         return
 
-    base_form = form_state.get("base_form")
-    if not isinstance(base_form, dict):
-        current_form = form_state.get("form")
-        if isinstance(current_form, dict):
-            base_form = _extract_base_form(current_form)
-        else:
+    base_form = form_state.base_form
+    if base_form is None:
+        if form_state.form is None:
             return
+        base_form = _extract_base_form(form_state.form)
 
-    base_query = query or str(form_state.get("query") or "")
-    citations = form_state.get("citations") or []
-    if not isinstance(citations, list):
-        citations = []
+    base_query = query or form_state.query
+    citations = form_state.citations
 
     base_fields = base_form.get("fields") if isinstance(base_form.get("fields"), list) else []
     base_fields = [f for f in base_fields if isinstance(f, dict)]
@@ -1267,8 +1720,8 @@ async def run_genui_form_change_flow(sid: str, inputs: Json) -> None:
             step="extend_form",
         )
         if isinstance(data, dict):
-            ui_source = _safe_str(data.get("ui_source", "fallback"), max_len=40).lower() or "fallback"
-            ui_reason = _safe_str(data.get("ui_source_reason", "extend_form"), max_len=80) or "extend_form"
+            ui_source = _safe_str(data.get("ui_source", "fallback"), 40).lower() or "fallback"
+            ui_reason = _safe_str(data.get("ui_source_reason", "extend_form"), 80) or "extend_form"
             raw = data.get("extra_fields") or []
             if isinstance(raw, dict):
                 raw = [raw]
@@ -1349,25 +1802,27 @@ async def run_genui_form_change_flow(sid: str, inputs: Json) -> None:
             pruned.append(f)
 
     updated_form = {**base_form, "fields": pruned}
-    await _set_form_state(sid, surface_id, {"query": base_query, "citations": citations, "base_form": base_form, "form": updated_form})
 
-    # Update results: replace first form block
+    # Update form state + results in one combined JSON-Patch push: the form
+    # block is replaced in place via its index instead of rebuilding and
+    # re-sending the whole results array.
     results = model.get("results") if isinstance(model, dict) else None
     if not isinstance(results, list):
         return
-    new_results: List[Json] = []
-    replaced = False
-    for b in results:
-        if isinstance(b, dict) and b.get("kind") == "form" and not replaced:
-            new_results.append(updated_form)
-            replaced = True
-        else:
-            new_results.append(b)
-    if not replaced:
-        new_results.append(updated_form)
+    sanitized = _sanitize_genui_blocks([updated_form])
+    new_form = sanitized[0] if sanitized else updated_form
+    form_idx = next((i for i, b in enumerate(results) if isinstance(b, dict) and b.get("kind") == "form"), None)
+
+    patches: List[Json] = [
+        {"op": "replace", "path": "/form", "value": FormState(query=base_query, citations=citations, base_form=base_form, form=updated_form).to_model()},
+    ]
+    if form_idx is None:
+        patches.append({"op": "add", "path": "/results/-", "value": new_form})
+    else:
+        patches.append({"op": "replace", "path": f"/results/{form_idx}", "value": new_form})
 
     await _set_status(sid, surface_id, loading=False, message="A2UI: Formulier aangevuld.", step="change", source=ui_source, sourceReason=ui_reason)
-    await _set_results(sid, surface_id, _sanitize_genui_blocks(new_results))
+    await hub.push_update_and_apply(sid, surface_id, patches)
 
 async def run_genui_form_submit_flow(sid: str, inputs: Json) -> None:
     surface_id = "genui_form"
@@ -1381,23 +1836,21 @@ async def run_genui_form_submit_flow(sid: str, inputs: Json) -> None:
     if not s:
         return
     model = s.get_model(surface_id)
-    form_state = model.get("form") if isinstance(model, dict) else None
-    if not isinstance(form_state, dict):
-        form_state = _form_default_state()
+    form_state = FormState.from_model(model.get("form") if isinstance(model, dict) else None) or _form_default_state()
 
-    citations = form_state.get("citations") or []
-    form_block = form_state.get("form")
-    if not isinstance(form_block, dict):
-        form_block = None
+    citations = form_state.citations
+    form_block = form_state.form
 
     schema = []
     if form_block and isinstance(form_block.get("fields"), list):
         schema = form_block.get("fields") or []
 
-    await _set_status(sid, surface_id, loading=True, message="A2UI: Validatie uitvoeren (MCP)…", step="validate_form", source="fallback", sourceReason="deterministic_form")
-    await _sleep_tick()
+    await _set_status(sid, surface_id, source="fallback", sourceReason="deterministic_form")
 
-    validate_resp = await _mcp_call_with_trace(sid, surface_id, "validate_form", {"schema": schema, "values": values}, step="validate_form")
+    validate_resp = await _mcp_call_with_trace(
+        sid, surface_id, "validate_form", {"schema": schema, "values": values},
+        step="validate_form", pre_message="A2UI: Validatie uitvoeren (MCP)…",
+    )
     ok = bool(validate_resp.get("ok")) if isinstance(validate_resp, dict) else False
     errors = validate_resp.get("errors") if isinstance(validate_resp, dict) else []
     if not isinstance(errors, list):
@@ -1406,16 +1859,25 @@ async def run_genui_form_submit_flow(sid: str, inputs: Json) -> None:
     if ok:
         notice = {"kind": "notice", "title": "Ingediend (demo)", "body": "Uw gegevens zijn ontvangen (demo). Hieronder ziet u de vervolgstappen."}
     else:
-        lines = ["Controleer uw invoer:"]
-        for e in errors[:8]:
-            if isinstance(e, dict):
-                fld = _safe_str(e.get("field") or "", max_len=40)
-                msg = _safe_str(e.get("message") or "Ongeldige waarde", max_len=120)
-                lines.append(f"- {fld}: {msg}")
+        safe = _safe_str
+        lines = ["Controleer uw invoer:"] + [
+            f"- {safe(e.get('field') or '', max_len=40)}: {safe(e.get('message') or 'Ongeldige waarde', max_len=120)}"
+            for e in errors[:8]
+            if isinstance(e, dict)
+        ]
         notice = {"kind": "notice", "title": "Controleer invoer", "body": "\n".join(lines)}
 
+    # Progressive: show the validation outcome right away; A2A uitleg follows as a delta.
+    merged: List[Json] = [
+        *([{"kind": "citations", "title": "Bronnen (MCP)", "items": citations}] if citations else []),
+        notice,
+        *([form_block] if form_block else []),
+    ]
+
+    await _set_form_state(sid, surface_id, FormState(query=query or form_state.query, citations=citations, form=form_block))
+    await _set_results(sid, surface_id, _sanitize_genui_blocks(merged))
+
     await _set_status(sid, surface_id, loading=True, message="A2UI: Uitleg maken (A2A)…", step="explain_form", source="fallback", sourceReason="deterministic_form")
-    await _sleep_tick()
 
     explain_blocks: List[Json] = []
     try:
@@ -1424,20 +1886,11 @@ async def run_genui_form_submit_flow(sid: str, inputs: Json) -> None:
         blocks_raw = (data.get("blocks") if isinstance(data, dict) else None) or []
         explain_blocks = _sanitize_genui_blocks(blocks_raw)
     except Exception:
-        explain_blocks = [
+        explain_blocks = _sanitize_genui_blocks([
             {"kind": "callout", "title": "Vervolgstap (demo)", "body": "Ga verder met het verzamelen van relevante stukken en controleer de termijnen. (Deterministische fallback.)"}
-        ]
+        ])
 
-    merged: List[Json] = []
-    if citations:
-        merged.append({"kind": "citations", "title": "Bronnen (MCP)", "items": citations})
-    merged.append(notice)
-    if form_block:
-        merged.append(form_block)
-    merged.extend(explain_blocks)
-
-    await _set_form_state(sid, surface_id, {"query": query or form_state.get("query") or "", "citations": citations, "form": form_block})
-    await _set_results(sid, surface_id, _sanitize_genui_blocks(merged))
+    await _append_results(sid, surface_id, explain_blocks)
 
     await _set_status(
         sid,
@@ -1448,3 +1901,32 @@ async def run_genui_form_submit_flow(sid: str, inputs: Json) -> None:
         source="fallback",
         sourceReason="deterministic_form",
     )
+
+
+# Dispatch-tabellen voor client-events: één dict-lookup per event in plaats
+# van een if-keten die met elk surface meegroeit. De alias-namen voor de
+# form-events wijzen naar dezelfde flow. Gedefinieerd ná de flow-functies.
+_NAV_SURFACES: Dict[str, tuple] = {
+    "toeslagen": ("toeslagen", "Toeslagen Check", "A2UI: Vul de gegevens in en klik op Check."),
+    "bezwaar": ("bezwaar", "Bezwaar Assistent", "A2UI: Plak een bezwaarbrief en klik op Analyseer."),
+    "genui_search": ("genui_search", "Generatieve UI — Zoeken", "A2UI: Stel een vraag en klik op Zoek."),
+    "genui_form": ("genui_form", "Generatieve UI — Formulier", "A2UI: Stel een vraag en klik op Genereer formulier."),
+    "genui_tree": ("genui_tree", "Generatieve UI — Wizard", "A2UI: Start de wizard…"),
+}
+
+_EVENT_FLOWS: Dict[str, Any] = {
+    "toeslagen/check": run_toeslagen_flow,
+    "bezwaar/analyse": run_bezwaar_flow,
+    "genui/search": run_genui_search_flow,
+    "genui/form_generate": run_genui_form_generate_flow,
+    "genui_form/generate": run_genui_form_generate_flow,
+    "genui_form/generate_form": run_genui_form_generate_flow,
+    "genui/form_submit": run_genui_form_submit_flow,
+    "genui_form/submit": run_genui_form_submit_flow,
+    "genui_form/form_submit": run_genui_form_submit_flow,
+    "genui/form_change": run_genui_form_change_flow,
+    "genui_form/change": run_genui_form_change_flow,
+    "genui_form/form_change": run_genui_form_change_flow,
+    "genui_tree/start": run_genui_tree_start_flow,
+    "genui_tree/choose": run_genui_tree_choose_flow,
+}
@@ -26,9 +26,10 @@ from __future__ import annotations
 
 import asyncio
 import json
+import os
 import uuid
 from dataclasses import dataclass
-from typing import Any, AsyncIterator, Dict, Tuple
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 
@@ -97,12 +98,30 @@ class MCPClient:
     small artificial latency introduced server-side.
     """
 
-    def __init__(self, sse_url: str):
+    def __init__(self, sse_url: str, client: Optional[httpx.AsyncClient] = None):
         """
         Args:
             sse_url: MCP SSE endpoint URL, typically "http://127.0.0.1:8000/sse".
+            client: Optional shared httpx.AsyncClient; when omitted the MCP
+                client owns its own pooled client (and aclose closes it).
         """
         self.sse_url = sse_url.rstrip("/")
+        # Persistent pooled client: the SSE stream and the /message POST of a
+        # tool call reuse keep-alive connections instead of paying a fresh
+        # TCP handshake per call.
+        self._owns_client = client is None
+        if client is None:
+            limits = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+            http2 = os.getenv("ORCH_HTTP2", "0").strip().lower() in ("1", "true", "yes")
+            try:
+                client = httpx.AsyncClient(timeout=None, limits=limits, http2=http2)
+            except ImportError:  # optional h2 package not installed
+                client = httpx.AsyncClient(timeout=None, limits=limits)
+        self._client = client
+
+    async def aclose(self) -> None:
+        if self._owns_client:
+            await self._client.aclose()
 
     def _normalize_sse_url(self) -> str:
         """
@@ -165,51 +184,127 @@ class MCPClient:
         call = MCPToolCall(id=str(uuid.uuid4()), name=name, arguments=arguments)
         req = call.to_jsonrpc()
 
-        async with httpx.AsyncClient(timeout=None) as client:
-            # 1) Open SSE stream
-            async with client.stream(
-                "GET",
-                sse_url,
-                headers={"Accept": "text/event-stream"},
-            ) as stream:
-
-                # 2) Post JSON-RPC call to message ingress
-                async def post_call() -> None:
-                    r = await client.post(message_url, json=req)
-                    r.raise_for_status()
-
-                post_task = asyncio.create_task(post_call())
-
-                # 3) Single consumer over the SSE stream
-                async def aiter_lines() -> AsyncIterator[str]:
-                    async for raw in stream.aiter_lines():
-                        # httpx yields decoded lines; keep them as-is
-                        yield raw
-
-                async def wait_for_response() -> Any:
-                    async for ev, data in _parse_sse_events(aiter_lines()):
-                        if ev != "message":
-                            continue
-
-                        # MCP server should emit JSON-RPC responses as data payload
-                        try:
-                            obj = json.loads(data)
-                        except json.JSONDecodeError:
-                            continue
-
-                        if obj.get("id") != call.id:
-                            continue
-
-                        if "error" in obj and obj["error"] is not None:
-                            raise RuntimeError(obj["error"])
-
-                        return obj.get("result")
-
-                    raise RuntimeError("SSE stream ended without response")
-
-                try:
-                    return await asyncio.wait_for(wait_for_response(), timeout=timeout_s)
-                finally:
-                    # Avoid dangling POST task if SSE handling fails early
-                    if not post_task.done():
-                        post_task.cancel()
+        client = self._client
+
+        # 1) Open SSE stream
+        async with client.stream(
+            "GET",
+            sse_url,
+            headers={"Accept": "text/event-stream"},
+        ) as stream:
+
+            # 2) Post JSON-RPC call to message ingress
+            async def post_call() -> None:
+                r = await client.post(message_url, json=req)
+                r.raise_for_status()
+
+            post_task = asyncio.create_task(post_call())
+
+            # 3) Single consumer over the SSE stream
+            async def aiter_lines() -> AsyncIterator[str]:
+                async for raw in stream.aiter_lines():
+                    # httpx yields decoded lines; keep them as-is
+                    yield raw
+
+            async def wait_for_response() -> Any:
+                async for ev, data in _parse_sse_events(aiter_lines()):
+                    if ev != "message":
+                        continue
+
+                    # MCP server should emit JSON-RPC responses as data payload
+                    try:
+                        obj = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+
+                    if obj.get("id") != call.id:
+                        continue
+
+                    if "error" in obj and obj["error"] is not None:
+                        raise RuntimeError(obj["error"])
+
+                    return obj.get("result")
+
+                raise RuntimeError("SSE stream ended without response")
+
+            try:
+                return await asyncio.wait_for(wait_for_response(), timeout=timeout_s)
+            finally:
+                # Avoid dangling POST task if SSE handling fails early
+                if not post_task.done():
+                    post_task.cancel()
+
+    async def batch_call(
+        self,
+        calls: List[Tuple[str, Dict[str, Any]]],
+        timeout_s: float = 8.0,
+    ) -> List[Any]:
+        """
+        Call several MCP tools in one JSON-RPC batch request.
+
+        Sends a single JSON-RPC array to POST /message (one HTTP round-trip
+        and one SSE framing instead of one per tool) and collects the
+        matching responses from the SSE stream.
+
+        Args:
+            calls: Sequence of (tool_name, arguments) pairs.
+            timeout_s: Timeout for receiving all matching responses on SSE.
+
+        Returns:
+            The "result" fields, in the same order as `calls`.
+
+        Raises:
+            RuntimeError: If the server returns a JSON-RPC error for any entry
+                         or the SSE stream ends before all responses arrived.
+            asyncio.TimeoutError: If not all responses arrive within timeout_s.
+            httpx.HTTPError: If POST /message fails (non-2xx).
+        """
+        if not calls:
+            return []
+
+        sse_url = self._normalize_sse_url()
+        message_url = self._message_url_from_sse_url(sse_url)
+
+        rpc_calls = [MCPToolCall(id=str(uuid.uuid4()), name=n, arguments=a) for n, a in calls]
+        req = [c.to_jsonrpc() for c in rpc_calls]
+        wanted = {c.id: i for i, c in enumerate(rpc_calls)}
+
+        client = self._client
+
+        async with client.stream(
+            "GET",
+            sse_url,
+            headers={"Accept": "text/event-stream"},
+        ) as stream:
+
+            async def post_call() -> None:
+                r = await client.post(message_url, json=req)
+                r.raise_for_status()
+
+            post_task = asyncio.create_task(post_call())
+
+            async def wait_for_responses() -> List[Any]:
+                results: List[Any] = [None] * len(rpc_calls)
+                pending = dict(wanted)
+                async for ev, data in _parse_sse_events(stream.aiter_lines()):
+                    if ev != "message":
+                        continue
+                    try:
+                        obj = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+                    idx = pending.pop(obj.get("id"), None)
+                    if idx is None:
+                        continue
+                    if "error" in obj and obj["error"] is not None:
+                        raise RuntimeError(obj["error"])
+                    results[idx] = obj.get("result")
+                    if not pending:
+                        return results
+                raise RuntimeError("SSE stream ended without all batch responses")
+
+            try:
+                return await asyncio.wait_for(wait_for_responses(), timeout=timeout_s)
+            finally:
+                if not post_task.done():
+                    post_task.cancel()
@@ -14,7 +14,17 @@ function ensurePath(obj, pointer) {
   let cur = obj;
   for (let i = 0; i < parts.length - 1; i++) {
     const seg = parts[i];
-    if (typeof cur[seg] !== 'object' || cur[seg] === null || Array.isArray(cur[seg])) {
+    if (Array.isArray(cur)) {
+      // Lijstsegment: alleen een bestaande index afdalen, nooit de lijst
+      // vervangen (spiegelt de Python-subset in a2ui.apply_patches).
+      const idx = Number(seg);
+      if (!Number.isInteger(idx) || idx < 0 || idx >= cur.length) {
+        return { parent: null, key: undefined };
+      }
+      cur = cur[idx];
+      continue;
+    }
+    if (typeof cur[seg] !== 'object' || cur[seg] === null) {
       cur[seg] = {};
     }
     cur = cur[seg];
@@ -30,7 +40,22 @@ export function applyPatches(model, patches) {
     if (!path || typeof path !== 'string' || !path.startsWith('/')) continue;
     if (op !== 'add' && op !== 'replace') continue;
     const { parent, key } = ensurePath(model, path);
-    if (key === undefined) continue;
+    if (parent == null || key === undefined) continue;
+    if (Array.isArray(parent)) {
+      // RFC 6902-lijstsubset: '-' = append, index = insert (add) of replace.
+      if (key === '-') {
+        parent.push(value);
+        continue;
+      }
+      const idx = Number(key);
+      if (!Number.isInteger(idx) || idx < 0) continue;
+      if (op === 'add') {
+        if (idx <= parent.length) parent.splice(idx, 0, value);
+      } else if (idx < parent.length) {
+        parent[idx] = value;
+      }
+      continue;
+    }
     parent[key] = value;
   }
   return model;
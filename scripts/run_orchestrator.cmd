@@ -1,4 +1,4 @@
 @echo off
 setlocal
 cd /d %~dp0\..\apps\orchestrator
-python -m uvicorn main:app --host 127.0.0.1 --port 10002
+python -m uvicorn main:app --host 127.0.0.1 --port 10002 --http httptools --no-access-log
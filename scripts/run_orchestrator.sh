@@ -1,4 +1,8 @@
 #!/usr/bin/env bash
 set -euo pipefail
 cd "$(dirname "$0")/../apps/orchestrator"
-python -m uvicorn main:app --host 127.0.0.1 --port 10002
+# httptools-parser + geen access-log: merkbaar minder CPU op de SSE-route.
+# De event loop kiest uvicorn zelf (uvloop indien geïnstalleerd).
+# Bewust één worker: SessionHub houdt sessies in-process; meer workers
+# vereist eerst gedeelde sessieopslag of sticky sessions op de LB.
+python -m uvicorn main:app --host 127.0.0.1 --port 10002 --http httptools --no-access-log
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import hmac
 import json
 import logging
 import os
@@ -24,6 +26,11 @@ GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googl
 GEMINI_MAX_TOKENS = int(os.getenv("GEMINI_MAX_TOKENS", "900"))
 TEMPERATURE = float(os.getenv("GEMINI_TEMPERATURE", "0.0"))
 
+# Optional shared secret: when set (here and in the orchestrator), compose_ui
+# responses carry an HMAC over the blocks so the orchestrator can skip its
+# full re-sanitization for this trusted producer. Off by default.
+GENUI_TRUSTED_SECRET = os.getenv("GENUI_TRUSTED_SECRET", "").strip()
+
 log = logging.getLogger("a2a_genui_agent")
 logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
 logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -624,5 +631,9 @@ async def jsonrpc(payload: Json = Body(...)):
     else:
         result = {"blocks": _fallback_blocks(query, citations), "ui_source": "fallback", "ui_source_reason": reason}
 
+    if GENUI_TRUSTED_SECRET:
+        payload_bytes = json.dumps(result["blocks"], separators=(",", ":"), sort_keys=True).encode("utf-8")
+        result["_trusted"] = hmac.new(GENUI_TRUSTED_SECRET.encode("utf-8"), payload_bytes, hashlib.sha256).hexdigest()
+
     log.info("ui_source=%s reason=%s", result.get("ui_source"), result.get("ui_source_reason"))
     return {"jsonrpc": "2.0", "id": req_id, "result": {"status": "ok", "data": result}}
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import functools
 import json
 import os
 import re
@@ -12,24 +13,45 @@ def _tokenize(s: str) -> List[str]:
     return re.findall(r"[a-z0-9]+", (s or "").lower())
 
 
-def _load_pages() -> List[Json]:
-    """Load curated Overheid pages dataset (demo-safe, deterministic)."""
+@functools.lru_cache(maxsize=1)
+def _load_pages() -> Tuple[Json, ...]:
+    """Load curated Overheid pages dataset (demo-safe, deterministic).
+
+    Cached: the dataset is a static file, so it is read and parsed once
+    per process instead of per call.
+    """
     here = os.path.dirname(__file__)
     path = os.path.join(here, "data", "bd_pages.json")
     with open(path, "r", encoding="utf-8") as f:
         data = json.load(f)
     pages = data.get("pages", [])
     if not isinstance(pages, list):
-        return []
-    return pages
+        return ()
+    return tuple(pages)
+
 
+@functools.lru_cache(maxsize=1)
+def _page_index() -> Tuple[Tuple[str, str, str, Json], ...]:
+    """Per page: (title_lower, keywords_lower, snippet_lower, result item).
+
+    Built once at first use so scoring works over prelowered strings and
+    the result dicts are allocated once instead of per query.
+    """
+    out: List[Tuple[str, str, str, Json]] = []
+    for p in _load_pages():
+        title = str(p.get("title", ""))
+        url = str(p.get("url", ""))
+        snippet = str(p.get("snippet", ""))
+        keywords = p.get("keywords", [])
+        if not isinstance(keywords, list):
+            keywords = []
+        item = {"title": title, "url": url, "snippet": snippet}
+        out.append((title.lower(), " ".join(keywords).lower(), snippet.lower(), item))
+    return tuple(out)
 
-def _score_page(tokens: List[str], title: str, snippet: str, keywords: List[str]) -> int:
-    """Deterministic scoring: title match is weighted heavier than snippet."""
-    t = (title or "").lower()
-    s = (snippet or "").lower()
-    k = " ".join((keywords or [])).lower()
 
+def _score_page(tokens: List[str], t: str, k: str, s: str) -> int:
+    """Deterministic scoring over prelowered strings: title weighs heaviest."""
     score = 0
     for tok in tokens:
         if tok in t:
@@ -52,21 +74,20 @@ def bd_search(query: str, k: int = 5) -> Json:
     Returns:
       { "items": [ { "title": str, "url": str, "snippet": str } ... ] }
     """
-    pages = _load_pages()
-    q = (query or "").strip()
-    tokens = _tokenize(q)
+    # Pure and deterministic over (query, k): memoize per genormaliseerde
+    # query zodat herhaalde zoekopdrachten geen scan/sort meer kosten.
+    items = _search_cached((query or "").strip().lower(), max(1, int(k or 5)))
+    return {"items": list(items)}
 
-    scored: List[Tuple[int, str, Json]] = []
-    for p in pages:
-        title = str(p.get("title", ""))
-        url = str(p.get("url", ""))
-        snippet = str(p.get("snippet", ""))
-        keywords = p.get("keywords", [])
-        if not isinstance(keywords, list):
-            keywords = []
-        score = _score_page(tokens, title, snippet, keywords)
 
-        scored.append((score, title.lower(), {"title": title, "url": url, "snippet": snippet}))
+@functools.lru_cache(maxsize=512)
+def _search_cached(q: str, k: int) -> Tuple[Json, ...]:
+    tokens = _tokenize(q)
+    index = _page_index()
+
+    scored: List[Tuple[int, str, Json]] = [
+        (_score_page(tokens, t, kw, sn), t, item) for (t, kw, sn, item) in index
+    ]
 
     # Sort: highest score first, then title for stability
     scored.sort(key=lambda x: (-x[0], x[1]))
@@ -76,6 +97,8 @@ def bd_search(query: str, k: int = 5) -> Json:
 
     # If nothing matched, return a stable "general" set
     if not items:
-        items = [{"title": str(p.get("title", "")), "url": str(p.get("url", "")), "snippet": str(p.get("snippet", ""))} for p in pages]
+        items = [item for (_, _, _, item) in index]
 
-    return {"items": items[: max(1, int(k or 5))]}
+    # Tuple zodat de cache-entry niet per ongeluk gemuteerd wordt; callers
+    # krijgen een verse lijst maar delen de (nooit gemuteerde) item-dicts.
+    return tuple(items[:k])
@@ -166,14 +166,27 @@ async def message(request: Request):
             status_code=200,
         )
 
-    req_id = msg.get("id")
-    method = msg.get("method")
-    params = msg.get("params") or {}
+    # JSON-RPC batch: een array van requests wordt parallel afgehandeld
+    # (de tools simuleren elk hun eigen latency; serieel zou de batch de
+    # som daarvan kosten) en levert een array van responses op, in
+    # requestvolgorde (elk ook op SSE gepubliceerd).
+    if isinstance(msg, list):
+        responses = await asyncio.gather(*(_handle_rpc(m) for m in msg))
+        return JSONResponse(list(responses), status_code=200)
+
+    return JSONResponse(await _handle_rpc(msg), status_code=200)
+
+
+async def _handle_rpc(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """Handle one JSON-RPC tools/call request and broadcast the response on SSE."""
+    req_id = msg.get("id") if isinstance(msg, dict) else None
+    method = msg.get("method") if isinstance(msg, dict) else None
+    params = (msg.get("params") or {}) if isinstance(msg, dict) else {}
 
     if method != "tools/call":
         resp = {"jsonrpc": "2.0", "id": req_id, "error": {"code": -32601, "message": "Method not found"}}
         await _publish_sse(resp)
-        return JSONResponse(resp, status_code=200)
+        return resp
 
     tool_name = params.get("name")
     arguments = params.get("arguments") or {}
@@ -185,4 +198,4 @@ async def message(request: Request):
         resp = {"jsonrpc": "2.0", "id": req_id, "error": {"code": -32000, "message": str(e)}}
 
     await _publish_sse(resp)
-    return JSONResponse(resp, status_code=200)
+    return resp